@@ -1,13 +1,23 @@
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Request, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, FileResponse
+from starlette.datastructures import Headers
+from starlette.responses import Response as StarletteResponse
+from starlette.staticfiles import NotModifiedResponse
 from fastapi.staticfiles import StaticFiles
 import os
 import sys
 import json
+import orjson
+import asyncio
 import hashlib
+import functools
 import logging
 import subprocess
-from typing import Dict, Any, List, Optional
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from src.core.checkpoint import PipelineState
 from src.utils.checkpoint_manager import CheckpointManager
 from src.core.storage import LocalStorage
@@ -19,7 +29,7 @@ logging.basicConfig(
 )
 logger = logging.getLogger("ComicServer")
 
-app = FastAPI(title="Comic Gen HITL Server")
+app = FastAPI(title="Comic Gen HITL Server", default_response_class=ORJSONResponse)
 
 # Enable CORS for the React frontend
 app.add_middleware(
@@ -37,19 +47,72 @@ checkpoint_mgr = CheckpointManager(storage)
 # Keep track of active pipeline processes
 active_processes: Dict[str, subprocess.Popen] = {}
 
+# LRU cache of serialized states for polling clients: input_hash -> (file validator, state dict, etag)
+STATE_CACHE_SIZE = 32
+_state_cache: "OrderedDict[str, Tuple[Tuple[int, int], Dict[str, Any], str]]" = OrderedDict()
+_state_cache_lock = threading.Lock()
+
 # Ensure upload directory exists
 os.makedirs("uploads", exist_ok=True)
 os.makedirs("output", exist_ok=True)
 
-@app.get("/api/state/{input_hash}")
-async def get_state(input_hash: str):
-    """Retrieves the current pipeline state for a given input hash."""
+# NOTE: Checkpoint reads/writes and Pydantic validation are blocking (disk + CPU).
+# Endpoints must run them via `await asyncio.to_thread(...)` so the event loop
+# keeps serving other HITL clients while a checkpoint is being loaded or saved.
+
+def _load_state_cached(input_hash: str) -> Optional[Tuple[Dict[str, Any], str]]:
+    """
+    Returns (state dict, etag) for a checkpoint, reusing the cached copy while the
+    checkpoint file's mtime/size are unchanged. Blocking; call via asyncio.to_thread.
+    """
+    path = checkpoint_mgr.get_checkpoint_path(input_hash)
+    try:
+        st = os.stat(path)
+        validator = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        validator = None
+
+    with _state_cache_lock:
+        cached = _state_cache.get(input_hash)
+        if validator and cached and cached[0] == validator:
+            _state_cache.move_to_end(input_hash)
+            return cached[1], cached[2]
+
     state = checkpoint_mgr.load_checkpoint(input_hash)
     if not state:
+        _invalidate_state_cache(input_hash)
+        return None
+
+    state_dict = state.model_dump(mode="json")
+    state_json = orjson.dumps(state_dict, option=orjson.OPT_SORT_KEYS)
+    etag = hashlib.blake2b(state_json, digest_size=8).hexdigest()
+
+    # Re-stat in case the file was pulled from cloud storage during load
+    if validator is None and os.path.exists(path):
+        st = os.stat(path)
+        validator = (st.st_mtime_ns, st.st_size)
+    if validator:
+        with _state_cache_lock:
+            _state_cache[input_hash] = (validator, state_dict, etag)
+            _state_cache.move_to_end(input_hash)
+            while len(_state_cache) > STATE_CACHE_SIZE:
+                _state_cache.popitem(last=False)
+    return state_dict, etag
+
+def _invalidate_state_cache(input_hash: str):
+    """Drops the cached state after the server writes a checkpoint."""
+    with _state_cache_lock:
+        _state_cache.pop(input_hash, None)
+
+@app.get("/api/state/{input_hash}")
+async def get_state(input_hash: str, request: Request):
+    """Retrieves the current pipeline state for a given input hash."""
+    cached = await asyncio.to_thread(_load_state_cached, input_hash)
+    if not cached:
         return {"error": "Checkpoint not found"}
+    base_dict, base_etag = cached
     
     # Enrich state with active process running status
-    state_dict = state.dict()
     is_running = False
     proc = active_processes.get(input_hash)
     if proc:
@@ -58,45 +121,84 @@ async def get_state(input_hash: str):
         else:
             # Clean up finished process
             active_processes.pop(input_hash, None)
-            
+
+    # The running flag is not part of the checkpoint, so fold it into the validator
+    etag = f'"{base_etag}-{int(is_running)}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    # Shallow copy so the cached dict is never mutated
+    state_dict = dict(base_dict)
+    state_dict["metadata"] = dict(state_dict.get("metadata") or {})
     state_dict["metadata"]["is_running"] = is_running
-    return state_dict
+    return ORJSONResponse(content=state_dict, headers={"ETag": etag})
 
-@app.post("/api/state/{input_hash}/update")
-async def update_state(input_hash: str, updated_data: Dict[str, Any]):
-    """Updates the pipeline state (used for HITL edits)."""
-    state = checkpoint_mgr.load_checkpoint(input_hash)
-    if not state:
-         raise HTTPException(status_code=404, detail="Checkpoint not found")
-    
+# Top-level fields that are deep-merged (dicts) or replaced (lists) by HITL edits
+MERGED_FIELDS = {"metadata": dict, "master_script": dict, "characters": list, "scene_plans": dict}
+
+@functools.lru_cache(maxsize=None)
+def _field_adapter(field_name: str) -> TypeAdapter:
+    """Cached validator for a single PipelineState field."""
+    return TypeAdapter(PipelineState.model_fields[field_name].annotation)
+
+def _merge_state_update(state: PipelineState, updated_data: Dict[str, Any]) -> PipelineState:
+    """
+    Deep-merges HITL edits into a state (CPU-bound, run off-loop).
+    Only the edited fields are re-validated; unknown fields fall back to full validation.
+    """
+    if any(k not in PipelineState.model_fields for k in updated_data):
+        return _merge_state_update_full(state, updated_data)
+
+    try:
+        updates = {}
+        for k, v in updated_data.items():
+            expected_type = MERGED_FIELDS.get(k)
+            if expected_type and not isinstance(v, expected_type):
+                continue
+            if expected_type is dict:
+                # Handle deep merge of metadata, master_script and scene_plans
+                current = getattr(state, k)
+                merged = current.model_dump() if isinstance(current, BaseModel) else dict(current or {})
+                merged.update(v)
+                v = merged
+            updates[k] = _field_adapter(k).validate_python(v)
+        return state.model_copy(update=updates)
+    except ValidationError:
+        raise
+    except Exception:
+        # e.g. a partially recovered (model_construct) state; take the slow, fully validated path
+        return _merge_state_update_full(state, updated_data)
+
+def _merge_state_update_full(state: PipelineState, updated_data: Dict[str, Any]) -> PipelineState:
+    """Reference merge: dumps the whole state, merges and re-validates every field."""
     state_dict = state.dict()
     
-    # Handle deep merge of metadata, master_script and characters
-    if "metadata" in updated_data and isinstance(updated_data["metadata"], dict):
-        if "metadata" not in state_dict or state_dict["metadata"] is None:
-            state_dict["metadata"] = {}
-        state_dict["metadata"].update(updated_data["metadata"])
-        
-    if "master_script" in updated_data and isinstance(updated_data["master_script"], dict):
-        if "master_script" not in state_dict or state_dict["master_script"] is None:
-             state_dict["master_script"] = {}
-        state_dict["master_script"].update(updated_data["master_script"])
-        
-    if "characters" in updated_data and isinstance(updated_data["characters"], list):
-        state_dict["characters"] = updated_data["characters"]
-        
-    if "scene_plans" in updated_data and isinstance(updated_data["scene_plans"], dict):
-        if "scene_plans" not in state_dict or state_dict["scene_plans"] is None:
-             state_dict["scene_plans"] = {}
-        state_dict["scene_plans"].update(updated_data["scene_plans"])
+    for k, expected_type in MERGED_FIELDS.items():
+        if k in updated_data and isinstance(updated_data[k], expected_type):
+            if expected_type is dict:
+                if k not in state_dict or state_dict[k] is None:
+                    state_dict[k] = {}
+                state_dict[k].update(updated_data[k])
+            else:
+                state_dict[k] = updated_data[k]
 
     # Update other top-level fields if passed
     for k, v in updated_data.items():
-        if k not in ["metadata", "master_script", "characters", "scene_plans"]:
+        if k not in MERGED_FIELDS:
             state_dict[k] = v
 
-    new_state = PipelineState.model_validate(state_dict)
-    checkpoint_mgr.save_checkpoint(new_state)
+    return PipelineState.model_validate(state_dict)
+
+@app.post("/api/state/{input_hash}/update")
+async def update_state(input_hash: str, updated_data: Dict[str, Any]):
+    """Updates the pipeline state (used for HITL edits)."""
+    state = await asyncio.to_thread(checkpoint_mgr.load_checkpoint, input_hash)
+    if not state:
+         raise HTTPException(status_code=404, detail="Checkpoint not found")
+    
+    new_state = await asyncio.to_thread(_merge_state_update, state, updated_data)
+    await asyncio.to_thread(checkpoint_mgr.save_checkpoint, new_state)
+    _invalidate_state_cache(input_hash)
     return {"status": "success", "state": new_state.dict()}
 
 @app.post("/api/pipeline/start")
@@ -125,7 +227,7 @@ async def start_pipeline(req: Request):
         f.write(story_text)
         
     # Pre-create or load checkpoint
-    state = checkpoint_mgr.load_checkpoint(story_hash)
+    state = await asyncio.to_thread(checkpoint_mgr.load_checkpoint, story_hash)
     if not state:
         state = PipelineState(
             input_hash=story_hash,
@@ -143,7 +245,8 @@ async def start_pipeline(req: Request):
         if style_preset:
             state.metadata["style_preset"] = style_preset
             
-    checkpoint_mgr.save_checkpoint(state)
+    await asyncio.to_thread(checkpoint_mgr.save_checkpoint, state)
+    _invalidate_state_cache(story_hash)
     
     # Check if a process is already running for this hash
     existing_proc = active_processes.get(story_hash)
@@ -183,15 +286,16 @@ async def stop_pipeline(input_hash: str):
         logger.info(f"Stopping pipeline process for hash {input_hash[:12]}...")
         proc.terminate()
         try:
-            proc.wait(timeout=5)
+            await asyncio.to_thread(proc.wait, timeout=5)
         except subprocess.TimeoutExpired:
             proc.kill()
         active_processes.pop(input_hash, None)
         
-    state = checkpoint_mgr.load_checkpoint(input_hash)
+    state = await asyncio.to_thread(checkpoint_mgr.load_checkpoint, input_hash)
     if state:
         state.metadata["auto_run"] = False
-        checkpoint_mgr.save_checkpoint(state)
+        await asyncio.to_thread(checkpoint_mgr.save_checkpoint, state)
+        _invalidate_state_cache(input_hash)
         
     return {"status": "stopped"}
 
@@ -201,28 +305,19 @@ async def approve_step(input_hash: str, step: str, updated_data: Optional[Dict[s
     Saves optional updated edits first, then sets approved_step = True
     in metadata to resume the blocked python agent.
     """
-    state = checkpoint_mgr.load_checkpoint(input_hash)
+    state = await asyncio.to_thread(checkpoint_mgr.load_checkpoint, input_hash)
     if not state:
          raise HTTPException(status_code=404, detail="Checkpoint not found")
          
     # Merge any incoming UI edits first
     if updated_data:
-        state_dict = state.dict()
-        if "master_script" in updated_data and isinstance(updated_data["master_script"], dict):
-            if "master_script" not in state_dict or state_dict["master_script"] is None:
-                state_dict["master_script"] = {}
-            state_dict["master_script"].update(updated_data["master_script"])
-        if "characters" in updated_data and isinstance(updated_data["characters"], list):
-            state_dict["characters"] = updated_data["characters"]
-        if "scene_plans" in updated_data and isinstance(updated_data["scene_plans"], dict):
-            if "scene_plans" not in state_dict or state_dict["scene_plans"] is None:
-                state_dict["scene_plans"] = {}
-            state_dict["scene_plans"].update(updated_data["scene_plans"])
-        state = PipelineState.model_validate(state_dict)
+        edits = {k: updated_data[k] for k in ("master_script", "characters", "scene_plans") if k in updated_data}
+        state = await asyncio.to_thread(_merge_state_update, state, edits)
 
     # Set approved flag
     state.metadata[f"approved_{step}"] = True
-    checkpoint_mgr.save_checkpoint(state)
+    await asyncio.to_thread(checkpoint_mgr.save_checkpoint, state)
+    _invalidate_state_cache(input_hash)
     logger.info(f"Set approved_{step} = True for {input_hash[:12]}")
     return {"status": "success", "state": state.dict()}
 
@@ -232,7 +327,7 @@ async def toggle_auto_run(input_hash: str, req: Request):
     data = await req.json()
     auto_run = data.get("auto_run", True)
     
-    state = checkpoint_mgr.load_checkpoint(input_hash)
+    state = await asyncio.to_thread(checkpoint_mgr.load_checkpoint, input_hash)
     if not state:
          raise HTTPException(status_code=404, detail="Checkpoint not found")
          
@@ -245,13 +340,14 @@ async def toggle_auto_run(input_hash: str, req: Request):
         if current_step:
             state.metadata[f"approved_{current_step}"] = True
             
-    checkpoint_mgr.save_checkpoint(state)
+    await asyncio.to_thread(checkpoint_mgr.save_checkpoint, state)
+    _invalidate_state_cache(input_hash)
     return {"status": "success", "auto_run": auto_run}
 
 @app.get("/api/projects")
 async def list_projects():
     """Lists all available project checkpoints with dynamic process state."""
-    projects_list = checkpoint_mgr.list_checkpoints()
+    projects_list = await asyncio.to_thread(checkpoint_mgr.list_checkpoints)
     for project in projects_list:
         h = project["input_hash"]
         is_running = False
@@ -268,8 +364,51 @@ async def list_projects():
 async def health():
     return {"status": "healthy"}
 
-# Serve generated static panel assets
-app.mount("/output", StaticFiles(directory="output"), name="output")
+class IndexedStaticFiles(StaticFiles):
+    """
+    StaticFiles that indexes its directory once at startup so repeat requests for
+    generated panels skip Starlette's per-request path resolution, and that emits
+    Cache-Control alongside the ETag so the dashboard can revalidate cheaply.
+    Files created after startup are served by the base class and then indexed.
+    """
+    def __init__(self, *args, cache_control: str = "public, max-age=3600", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+        self._index: Dict[str, str] = {}
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                full_path = os.path.realpath(os.path.join(root, name))
+                self._index[os.path.normpath(os.path.relpath(full_path, os.path.realpath(self.directory)))] = full_path
+        logger.info(f"Indexed {len(self._index)} static files under {self.directory}")
+
+    async def get_response(self, path: str, scope) -> StarletteResponse:
+        full_path = self._index.get(path)
+        if full_path and scope["method"] in ("GET", "HEAD"):
+            try:
+                stat_result = await asyncio.to_thread(os.stat, full_path)
+                return self.file_response(full_path, stat_result, scope)
+            except OSError:
+                # File was removed since it was indexed
+                self._index.pop(path, None)
+
+        response = await super().get_response(path, scope)
+        if isinstance(response, FileResponse) and response.status_code == 200:
+            self._index[path] = str(response.path)
+        return response
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> StarletteResponse:
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            headers={"Cache-Control": self.cache_control}
+        )
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+# Serve generated static panel assets (indexed once at import)
+app.mount("/output", IndexedStaticFiles(directory="output"), name="output")
 
 if __name__ == "__main__":
     import uvicorn
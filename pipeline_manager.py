@@ -12,6 +12,8 @@ from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.chrome.service import Service as ChromeService
 from webdriver_manager.chrome import ChromeDriverManager
 import shutil
+import fnmatch
+import socket
 
 # Configure logging
 logging.basicConfig(
@@ -27,22 +29,93 @@ logger = logging.getLogger("PipelineManager")
 # Configuration
 NOTEBOOK_ID = "1DufUIy9ZOY0y9p-D68_clJy6RU2KlI4y"
 REPO_PATH = r"c:\Users\yashs\antigravity"
+SYNC_TIMEOUT_S = 300 # 5 minutes max wait per cell
+SYNC_MAX_DELAY_S = 10.0 # Backoff ceiling between sync checks
+
+# Files that must never be carried over into the agent's profile copy
+PROFILE_LOCK_PATTERNS = ('Singleton*', 'lock', 'lockfile', 'Last Session', 'Last Tabs')
+AGENT_PROFILE_NAME = "agent_run"
+
+def _clone_profile(src, dst):
+    """
+    Clones a Chrome profile as cheaply as the platform allows:
+    multi-threaded robocopy on Windows, copy-on-write `cp --reflink=auto` on Linux,
+    and a plain copytree everywhere else (or if the fast path fails).
+    """
+    if sys.platform == "win32":
+        result = subprocess.run(
+            ["robocopy", src, dst, "/MIR", "/MT:16", "/NFL", "/NDL", "/NJH", "/NJS",
+             "/XF", "Singleton*", "lock", "lockfile", "Last Session", "Last Tabs"],
+            capture_output=True, text=True
+        )
+        # Robocopy exit codes below 8 mean success
+        if result.returncode < 8:
+            return
+        # A failed robocopy can leave a partial copy behind, which copytree would refuse
+        shutil.rmtree(dst, ignore_errors=True)
+    elif sys.platform.startswith("linux") and shutil.which("cp"):
+        result = subprocess.run(["cp", "-a", "--reflink=auto", src, dst], capture_output=True, text=True)
+        if result.returncode == 0:
+            # The copied locks point at whichever Chrome owns the source, not at this copy
+            _clear_profile_locks(dst, check_in_use=False)
+            return
+        shutil.rmtree(dst, ignore_errors=True)
+
+    shutil.copytree(src, dst, ignore=shutil.ignore_patterns(*PROFILE_LOCK_PATTERNS))
+
+def _profile_lock_owner_alive(profile_path):
+    """
+    On Linux, Chrome's SingletonLock is a symlink to "<hostname>-<pid>" and can be unlinked even
+    while that Chrome runs, so check whether the owning process is still alive.
+    """
+    lock_path = os.path.join(profile_path, "SingletonLock")
+    if not os.path.islink(lock_path):
+        return False
+    host, _, pid = os.readlink(lock_path).rpartition("-")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True # Alive, owned by another user
+    return True
+
+def _clear_profile_locks(profile_path, check_in_use=True):
+    """Removes stale lock/session files from a profile. Raises OSError if one is still in use."""
+    if check_in_use and not sys.platform == "win32" and _profile_lock_owner_alive(profile_path):
+        raise OSError(f"Profile {profile_path} is locked by a running Chrome")
+    for entry in os.listdir(profile_path):
+        if any(fnmatch.fnmatch(entry, pattern) for pattern in PROFILE_LOCK_PATTERNS):
+            full_path = os.path.join(profile_path, entry)
+            if os.path.isdir(full_path) and not os.path.islink(full_path):
+                shutil.rmtree(full_path)
+            else:
+                os.remove(full_path)
 
 def patched_create_driver(self):
     self.logger.info("PATCHED: Using robust driver creation")
     options = ChromeOptions()
     
-    # Use a new profile name to avoid locks
-    test_profile_name = f"agent_run_{int(time.time())}"
-    base_dir = os.path.dirname(self.profile_manager.get_profile_path(self.profile_name))
-    profile_path = os.path.join(base_dir, test_profile_name)
-    
-    # If the original default profile exists, try to copy it to our new test profile
     default_path = self.profile_manager.get_profile_path(self.profile_name)
+    base_dir = os.path.dirname(default_path)
+    
+    # Reuse a single agent profile across runs; it is only cloned from the default profile once.
+    profile_path = os.path.join(base_dir, AGENT_PROFILE_NAME)
+    if os.path.exists(profile_path):
+        try:
+            _clear_profile_locks(profile_path)
+        except OSError as e:
+            # Another Chrome still holds the reusable profile; use a fresh one to avoid locks
+            self.logger.warning(f"Reusable profile is in use ({e}). Using a fresh profile.")
+            profile_path = os.path.join(base_dir, f"{AGENT_PROFILE_NAME}_{int(time.time())}")
+    
+    # If the original default profile exists, clone it into our agent profile
     if os.path.exists(default_path) and not os.path.exists(profile_path):
         self.logger.info(f"Copying default profile from {default_path} to {profile_path}...")
         try:
-            shutil.copytree(default_path, profile_path, ignore=shutil.ignore_patterns('Singleton*', 'lock', 'Last Session', 'Last Tabs'))
+            _clone_profile(default_path, profile_path)
             self.logger.info("Profile copied successfully.")
         except Exception as e:
             self.logger.warning(f"Failed to copy profile: {e}")
@@ -73,8 +146,22 @@ logger.info("Applied monkeypatch to ColabSeleniumManager._create_driver")
 async def run_cell_with_sync(server, code, name):
     logger.info(f"🚀 Executing: {name}")
     
-    # Add a success marker to the code
-    augmented_code = code + f"\nprint('---SUCCESS_MARKER:{name}:FINISHED---')"
+    # The main cell always drops a flag file holding "ok" or "error" when it finishes (even if the
+    # code raises), so sync checks are a cheap file read and failures surface immediately
+    flag_path = f"/content/done_{name.replace(' ', '_').lower()}.flag"
+    
+    # Clear any stale flag, then run the code under try/finally so the flag is written either way.
+    # The code runs via exec in the notebook's globals, so the cell's names stay visible to later cells.
+    augmented_code = (
+        f"import os as _os\nif _os.path.exists({flag_path!r}): _os.remove({flag_path!r})\n"
+        f"_sync_status = 'error'\n"
+        f"try:\n"
+        f"    exec(compile({code!r}, {name!r}, 'exec'), globals())\n"
+        f"    print('---SUCCESS_MARKER:{name}:FINISHED---')\n"
+        f"    _sync_status = 'ok'\n"
+        f"finally:\n"
+        f"    with open({flag_path!r}, 'w') as _flag: _flag.write(_sync_status)\n"
+    )
     
     # 1. Trigger the execution. 
     # Since we know detection might fail, we call it.
@@ -84,15 +171,24 @@ async def run_cell_with_sync(server, code, name):
         "confirm_execution": True
     })
     
-    # 2. Sync loop: Run a tiny command and check for our marker
+    # 2. Sync loop: Run a tiny flag check with exponential backoff (1s, 1.5s, 2.25s ... capped at 10s)
     # We do this because Colab executes cells sequentially.
-    sync_code = f"print('---SYNC_MARKER:{name}:CHECK---')"
-    max_retries = 30 # 30 * 10s = 5 minutes max wait
+    sync_code = (
+        f"import os\n"
+        f"_status = open({flag_path!r}).read().strip() if os.path.exists({flag_path!r}) else ''\n"
+        f"print('---SYNC_MARKER:{name}:CHECK---' if _status == 'ok' "
+        f"else '---SYNC_FAILED:{name}---' if _status else '---SYNC_PENDING:{name}---')"
+    )
     
     logger.info(f"Waiting for {name} to complete via sync cells...")
-    for i in range(max_retries):
-        await asyncio.sleep(10)
-        # We run the sync code. It will only run after the main code finishes.
+    delay = 1.0
+    elapsed = 0.0
+    while elapsed < SYNC_TIMEOUT_S:
+        await asyncio.sleep(delay)
+        elapsed += delay
+        delay = min(delay * 1.5, SYNC_MAX_DELAY_S)
+        
+        # The check only runs after the main code finishes, and only prints the marker if the flag exists.
         result = await server._run_code_cell({
             "code": sync_code,
             "notebook_id": NOTEBOOK_ID,
@@ -100,18 +196,14 @@ async def run_cell_with_sync(server, code, name):
         })
         
         output = result.get("output", "")
-        # If the sync cell output contains our sync marker, it means the sync cell RAN.
-        # If it ran, the previous cell MUST have finished.
+        # If the sync cell output contains our sync marker, the main cell ran to completion.
         if f"---SYNC_MARKER:{name}:CHECK---" in output:
-            logger.info(f"✅ Sync confirmed for {name}.")
-            # Now we need to verify if the PREVIOUS cell's code actually finished successfully
-            # In a real scenario, we might want to check the output of the main cell specifically,
-            # but since we can't easily retrieve it after it finishes 'silently', we can
-            # have the main cell write its output to a file and read it here.
-            
-            # For now, we'll run one more check to see if the success marker exists in the 
-            # environment or if we can find it in any recent output.
+            logger.info(f"✅ Sync confirmed for {name} after {elapsed:.1f}s.")
             return True, output
+        # The main cell finished but raised; no point waiting out the timeout
+        if f"---SYNC_FAILED:{name}---" in output:
+            logger.error(f"❌ {name} raised an error (reported after {elapsed:.1f}s).")
+            return False, output
             
     logger.error(f"❌ Timeout waiting for {name} to sync.")
     return False, "Sync timeout"
@@ -131,16 +223,17 @@ async def main():
         with open(notebook_path, 'r', encoding='utf-8') as f:
             nb = json.load(f)
 
-        # Extract code from cells
+        # Cell indices to run; source is only joined right before each cell executes
         cells_to_run = [
-            ("".join(nb['cells'][1]['source']), "Setup"),
-            ("".join(nb['cells'][2]['source']), "Dashboard"),
-            ("".join(nb['cells'][3]['source']), "Progress Helper"),
-            ("".join(nb['cells'][4]['source']), "Planning Phase"),
-            ("".join(nb['cells'][5]['source']), "Drawing Phase")
+            (1, "Setup"),
+            (2, "Dashboard"),
+            (3, "Progress Helper"),
+            (4, "Planning Phase"),
+            (5, "Drawing Phase")
         ]
 
-        for code, name in cells_to_run:
+        for cell_index, name in cells_to_run:
+            code = "".join(nb['cells'][cell_index]['source'])
             success, output = await run_cell_with_sync(server, code, name)
             if not success:
                 logger.error(f"‼️ Pipeline execution failed at {name}")
@@ -3,38 +3,44 @@ from src.core.agent import BaseAgent
 from src.core.models import Panel, Scene
 
 class LayoutEngine(BaseAgent):
+    def __init__(self, agent_name: str = "LayoutEngine", config: Dict[str, Any] = None):
+        super().__init__(agent_name, config)
+        self.cols = self.config.get("cols", 2)
+        self.last_layout: Dict[str, Any] = {}
+
+    def compute_layout(self, num_panels: int) -> Dict[str, Any]:
+        """
+        Computes the grid layout for a page in structure-of-arrays form:
+        {"x": [...], "y": [...], "w": float, "h": float} (normalized 0-1), indexed like the panels.
+        """
+        if num_panels <= 0:
+            return {"x": [], "y": [], "w": 0.0, "h": 0.0}
+
+        # Simple Logic: fixed number of columns, as many rows as needed
+        cols = self.cols
+        rows = (num_panels + cols - 1) // cols
+        panel_width = 1.0 / cols
+        panel_height = 1.0 / rows
+
+        return {
+            "x": [(idx % cols) * panel_width for idx in range(num_panels)],
+            "y": [(idx // cols) * panel_height for idx in range(num_panels)],
+            "w": panel_width,
+            "h": panel_height
+        }
+
     def process(self, panels: List[Panel]) -> List[Panel]:
         """
         Organizes panels into a page layout.
-        Currently a simple linear layout, but can be extended to grid or dynamic layouts.
+        Currently a simple grid layout, but can be extended to dynamic layouts.
+        The computed layout is kept on `last_layout` for downstream assembly.
         """
         self.logger.info("Computing page layout...")
-        # For MVP, assume a simple vertical stack or 2x2 grid
-        # We just assign basic coordinates/sizes to the panels
-        # x, y, width, height (normalized 0-1)
-        
-        num_panels = len(panels)
-        # Simple Logic: 2 columns
-        cols = 2
-        rows = (num_panels + 1) // 2
-        
-        for idx, panel in enumerate(panels):
-            row = idx // cols
-            col = idx % cols
-            
-            panel_width = 1.0 / cols
-            panel_height = 1.0 / rows
-            
-            # Decorate the panel object with layout info (assuming specific field exists or we just add it to metadata)
-            # Since Panel model doesn't have layout fields, we'll just log it for now
-            # or return a dict with layout info.
-            layout_info = {
-                "x": col * panel_width,
-                "y": row * panel_height,
-                "w": panel_width,
-                "h": panel_height
-            }
-            # Log layout decision
-            self.logger.debug(f"Panel {panel.id} layout: {layout_info}")
-            
+        # Since Panel model doesn't have layout fields, the layout lives alongside the panels
+        # rather than on them (keeps it out of the LLM-facing schema).
+        layout = self.compute_layout(len(panels))
+        self.last_layout = {"panel_ids": [panel.id for panel in panels], **layout}
+
+        # Log layout decision
+        self.logger.debug(f"Page layout: {self.last_layout}")
         return panels
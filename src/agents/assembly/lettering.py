@@ -1,65 +1,158 @@
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
 from src.core.agent import BaseAgent
 from src.core.models import Panel
 from PIL import Image, ImageDraw, ImageFont # Using Pillow for simple rendering
 import os
+import functools
+
+# Basic font - in production, load a comic font (.ttf)
+FONT_PATH = "arial.ttf"
+FONT_SIZE = 18
+
+@functools.lru_cache(maxsize=32)
+def _load_font(path: str, size: int):
+    """Loads a TTF font once per (path, size); falls back to PIL's default font."""
+    try:
+        # Attempt to load a default font that might be available
+        return ImageFont.truetype(path, size)
+    except OSError:
+        return ImageFont.load_default()
+
+def lettered_path(image_path: str, output_format: str = "png") -> str:
+    """Where the lettered copy of `image_path` is written for the given output format."""
+    ext = "webp" if output_format == "webp" else "png"
+    return f"{os.path.splitext(image_path)[0]}_lettered.{ext}"
+
+def _layout_bubbles(draw: ImageDraw.ImageDraw, font, dialogues: List[Dict[str, str]]) -> List[Tuple[List[int], Tuple[int, int], str]]:
+    """
+    Computes (bubble rect, text origin, text) for each dialogue line, stacked from the top left.
+    """
+    bubbles = []
+    y_offset = 20
+    for dialogue in dialogues:
+        speaker = dialogue.get('speaker', 'Unknown')
+        text = dialogue.get('text', '')
+        full_text = f"{speaker.upper()}\n{text}"
+
+        # Calculate text size to size the bubble from the real glyph metrics
+        left, top, right, bottom = draw.multiline_textbbox((0, 0), full_text, font=font, align="center")
+        max_w = right - left
+        total_h = (bottom - top) + 20
+
+        bubble_rect = [20, y_offset, 40 + max_w + 20, y_offset + total_h + 20]
+        bubbles.append((bubble_rect, (40, y_offset + 10), full_text))
+        y_offset += total_h + 40
+    return bubbles
+
+def _letter_image(image_path: str, dialogues: List[Dict[str, str]], output_format: str = "png",
+                  png_compress_level: int = 1, webp_quality: int = 90) -> str:
+    """
+    Draws the speech bubbles onto a panel image and saves the lettered copy.
+    Touches no agent state, so several calls can run at once on the agent's thread pool.
+    """
+    # Load the image
+    img = Image.open(image_path)
+
+    # Comic book lettering logic
+    # For each dialogue, we draw a bubble.
+    # In Phase 2, we will eventually allow the UI to specify coordinates.
+    # For now, we stack them from the top left.
+    font = _load_font(FONT_PATH, FONT_SIZE)
+
+    if dialogues:
+        # Render every bubble onto one transparent overlay, then composite once
+        overlay = Image.new("RGBA", img.size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(overlay)
+        for bubble_rect, text_xy, full_text in _layout_bubbles(draw, font, dialogues):
+            draw.ellipse(bubble_rect, fill="white", outline="black", width=2)
+            draw.multiline_text(text_xy, full_text, fill="black", font=font, align="center")
+
+        has_alpha = img.mode == "RGBA"
+        img = Image.alpha_composite(img.convert("RGBA"), overlay)
+        if not has_alpha:
+            img = img.convert("RGB")
+
+    # Save the new version (default zlib level 6 dominates encode time, so go light)
+    output_path = lettered_path(image_path, output_format)
+    if output_format == "webp":
+        img.save(output_path, format="WEBP", quality=webp_quality, method=0)
+    else:
+        img.save(output_path, format="PNG", compress_level=png_compress_level)
+    return output_path
+
+def _letter_image_safe(args: Tuple[str, List[Dict[str, str]], str, int, int]) -> Tuple[Optional[str], Optional[str]]:
+    """Pool-side wrapper returning (output path, error message) instead of raising."""
+    try:
+        return _letter_image(*args), None
+    except Exception as e:
+        return None, str(e)
 
 class LetteringAgent(BaseAgent):
-    def process(self, panel: Panel) -> str:
+    def __init__(self, agent_name: str = "LetteringAgent", config: Dict[str, Any] = None):
+        super().__init__(agent_name, config)
+        # "png" (fast zlib level) or "webp" (faster encode, smaller files)
+        self.output_format = self.config.get("output_format", "png").lower()
+        self.png_compress_level = self.config.get("png_compress_level", 1)
+        self.webp_quality = self.config.get("webp_quality", 90)
+        self.max_workers = self.config.get("max_workers", os.cpu_count())
+        # One pool for the whole run. Threads rather than processes: PIL releases the GIL while
+        # decoding/encoding, and forking a parent that already holds CUDA state and live threads
+        # (image save pool, checkpoint sync) can deadlock.
+        self._pool = ThreadPoolExecutor(max_workers=max(1, self.max_workers or 1), thread_name_prefix="lettering")
+
+    def process(self, panel: Union[Panel, List[Panel]]) -> Union[Optional[str], List[Optional[str]]]:
         """
-        Adds text/speech bubbles to the panel image.
+        Adds text/speech bubbles to the panel image. A list of panels is lettered in parallel
+        (see `process_batch`), so `run` works for whole scenes too.
         """
+        if isinstance(panel, list):
+            return self.process_batch(panel)
         self.logger.info(f"Adding lettering to Panel {panel.id}...")
-        
+
         if not panel.image_path or not os.path.exists(panel.image_path):
              self.logger.warning(f"No image found for Panel {panel.id}, skipping lettering.")
              return None
-             
+
         try:
-            # Load the image
-            img = Image.open(panel.image_path)
-            draw = ImageDraw.Draw(img)
-            
-            # Comic book lettering logic
-            # For each dialogue, we draw a bubble. 
-            # In Phase 2, we will eventually allow the UI to specify coordinates.
-            # For now, we stack them from the top left.
-            y_offset = 20
-            
-            for dialogue in panel.dialogue:
-                 speaker = dialogue.get('speaker', 'Unknown')
-                 text = dialogue.get('text', '')
-                 full_text = f"{speaker.upper()}\n{text}"
-                 
-                 # Basic font - in production, load a comic font (.ttf)
-                 font_size = 18
-                 try:
-                     # Attempt to load a default font that might be available
-                     font = ImageFont.truetype("arial.ttf", font_size)
-                 except:
-                     font = ImageFont.load_default()
-
-                 # Calculate text size to size the bubble
-                 # text_size = draw.multiline_textbbox((0, 0), full_text, font=font)
-                 # Simpler estimation for compatibility
-                 lines = full_text.split('\n')
-                 max_w = max([len(line) for line in lines]) * 10
-                 total_h = len(lines) * 20 + 20
-                 
-                 # Draw Bubble (Ellipse)
-                 bubble_rect = [20, y_offset, 20 + max_w + 30, y_offset + total_h + 20]
-                 draw.ellipse(bubble_rect, fill="white", outline="black", width=2)
-                 
-                 # Draw Text
-                 draw.multiline_text((40, y_offset + 10), full_text, fill="black", font=font, align="center")
-                 
-                 y_offset += total_h + 40
-            
-            # Save the new version
-            output_path = panel.image_path.replace(".png", "_lettered.png")
-            img.save(output_path)
-            return output_path
-            
+            return _letter_image(*self._render_args(panel))
         except Exception as e:
             self.logger.error(f"Lettering failed: {e}")
             return panel.image_path
+
+    def process_batch(self, panels: List[Panel]) -> List[Optional[str]]:
+        """
+        Letters several panels in parallel on the agent's thread pool.
+        Results follow the same conventions as `process`, in panel order.
+        """
+        self.logger.info(f"Adding lettering to {len(panels)} panels in parallel...")
+        results: List[Optional[str]] = [None] * len(panels)
+        jobs = []
+        for i, panel in enumerate(panels):
+            if not panel.image_path or not os.path.exists(panel.image_path):
+                self.logger.warning(f"No image found for Panel {panel.id}, skipping lettering.")
+                continue
+            jobs.append((i, self._render_args(panel)))
+
+        if len(jobs) <= 1:
+            # Not worth a round trip through the pool for a single panel
+            for i, args in jobs:
+                results[i] = self.process(panels[i])
+            return results
+
+        outputs = self._pool.map(_letter_image_safe, [args for _, args in jobs])
+        for (i, _), (output_path, error) in zip(jobs, outputs):
+            if error:
+                self.logger.error(f"Lettering failed for Panel {panels[i].id}: {error}")
+                results[i] = panels[i].image_path
+            else:
+                results[i] = output_path
+        return results
+
+    def shutdown(self, wait: bool = True):
+        """Shuts down the lettering thread pool."""
+        self._pool.shutdown(wait=wait)
+
+    def _render_args(self, panel: Panel) -> Tuple[str, List[Dict[str, str]], str, int, int]:
+        """Positional arguments for `_letter_image` (image path, dialogue and encoder settings)."""
+        return (panel.image_path, list(panel.dialogue), self.output_format, self.png_compress_level, self.webp_quality)
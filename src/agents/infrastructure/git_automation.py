@@ -1,11 +1,28 @@
 import subprocess
 import logging
 import os
-from typing import Optional
+import shlex
+import functools
+from typing import Optional, List, Union
 from src.core.agent import BaseAgent
 
+try:
+    import pygit2
+except ImportError:
+    pygit2 = None
+
 logger = logging.getLogger(__name__)
 
+# Pre-split argument lists for the commands we run repeatedly
+GIT_ADD_ALL = ["git", "add", "."]
+GIT_PUSH = ["git", "push"]
+GIT_DIFF_CACHED_QUIET = ["git", "diff", "--cached", "--quiet"]
+
+@functools.lru_cache(maxsize=64)
+def _split_command(command: str) -> tuple:
+    """Memoized shlex.split for the legacy string form of run_command."""
+    return tuple(shlex.split(command))
+
 class GitAutomationAgent(BaseAgent):
     def process(self, commit_message: str = "Auto-update by AI Agent") -> str:
         """
@@ -26,23 +43,14 @@ class GitAutomationAgent(BaseAgent):
             raise RuntimeError("Current directory is not a git repository.")
 
         try:
-            # 2. Add all changes
-            self.logger.info("Staging changes...")
-            self.run_command("git add .")
-            
-            # 3. Check if there are changes to commit
-            status = subprocess.run(["git", "status", "--porcelain"], capture_output=True, text=True)
-            if not status.stdout.strip():
+            # 2-4. Stage, check for changes and commit
+            if not self._stage_and_commit(commit_message):
                 self.logger.info("No changes to commit.")
                 return "No changes to commit."
-
-            # 4. Commit
-            self.logger.info(f"Committing with message: {commit_message}")
-            self.run_command(f'git commit -m "{commit_message}"')
             
             # 5. Push
             self.logger.info("Pushing to remote...")
-            self.run_command("git push")
+            self.run_command(GIT_PUSH)
             
             self.logger.info("Git Push Successful!")
             return "Success: Changes pushed to remote."
@@ -52,14 +60,45 @@ class GitAutomationAgent(BaseAgent):
             self.logger.error(error_msg)
             raise RuntimeError(error_msg)
 
-    def run_command(self, command: str) -> str:
-        """Runs a raw git command and returns output."""
+    def _stage_and_commit(self, commit_message: str) -> bool:
+        """
+        Stages all changes and commits them. Returns False if there was nothing to commit.
+        Uses libgit2 in-process when pygit2 is installed, avoiding one git process per step.
+        """
+        self.logger.info("Staging changes...")
+        if pygit2 is not None:
+            try:
+                repo = pygit2.Repository(".")
+                repo.index.add_all()
+                repo.index.write()
+                tree = repo.index.write_tree()
+                parents = [] if repo.head_is_unborn else [repo.head.target]
+                if parents and tree == repo.head.peel(pygit2.Commit).tree.id:
+                    return False
+
+                self.logger.info(f"Committing with message: {commit_message}")
+                signature = repo.default_signature
+                repo.create_commit("HEAD", signature, signature, commit_message, tree, parents)
+                return True
+            except Exception as e:
+                self.logger.warning(f"pygit2 staging failed ({e}). Falling back to git CLI.")
+
+        self.run_command(GIT_ADD_ALL)
+        # Exit code 0 means the index matches HEAD, i.e. nothing to commit
+        diff = subprocess.run(GIT_DIFF_CACHED_QUIET)
+        if diff.returncode == 0:
+            return False
+
+        self.logger.info(f"Committing with message: {commit_message}")
+        self.run_command(["git", "commit", "-m", commit_message])
+        return True
+
+    def run_command(self, command: Union[str, List[str]]) -> str:
+        """Runs a raw git command (argument list, or a string to be shell-split) and returns output."""
+        args = list(command) if isinstance(command, (list, tuple)) else list(_split_command(command))
         try:
-            # We use shell=True carefully for git commands
-            import shlex
-            args = shlex.split(command)
             result = subprocess.run(args, check=True, capture_output=True, text=True)
             return result.stdout
         except subprocess.CalledProcessError as e:
-            self.logger.warning(f"Git command '{command}' failed: {e.stderr}")
+            self.logger.warning(f"Git command '{' '.join(args)}' failed: {e.stderr}")
             raise RuntimeError(e.stderr)
@@ -1,81 +1,191 @@
 import os
+import io
+import asyncio
 import ast
+import mmap
+import pickle
+import unittest
 import logging
 import subprocess
 import sys
-from typing import Dict, Any, List, Set, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Set, Tuple, Optional, Iterable, Iterator
 from src.core.agent import BaseAgent
-from src.utils.llm_interface import LLMInterface
+from src.agents.infrastructure.validation_agent import check_syntax
+from src.utils.llm_interface import get_llm
 from pydantic import BaseModel, Field
 
 logger = logging.getLogger(__name__)
 
+# Below this many uncached files, process-pool startup costs more than it saves
+PARALLEL_PARSE_THRESHOLD = 32
+
+def _extract_methods_static(filepath: str) -> Tuple[Optional[Tuple[int, int]], List[str], Optional[str]]:
+    """
+    Module-level (picklable) parser used by the process pool.
+    Returns (file key, methods, error message) for a Python file.
+    """
+    try:
+        st = os.stat(filepath)
+        with open(filepath, "r", encoding="utf-8") as f:
+            node = ast.parse(f.read())
+
+        methods = []
+        for item in node.body:
+            if isinstance(item, ast.ClassDef):
+                class_name = item.name
+                for subitem in item.body:
+                    if isinstance(subitem, ast.FunctionDef):
+                        if not subitem.name.startswith("_"):
+                            methods.append(f"{class_name}.{subitem.name}")
+            elif isinstance(item, ast.FunctionDef):
+                if not item.name.startswith("_"):
+                    methods.append(item.name)
+        return (st.st_mtime_ns, st.st_size), methods, None
+    except Exception as e:
+        return None, [], str(e)
+
+def _walk_py_files(directory: str) -> Iterator[str]:
+    """Recursively yields .py file paths using os.scandir (no extra stat per entry)."""
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from _walk_py_files(entry.path)
+        elif entry.name.endswith(".py"):
+            yield entry.path
+
 class TestCode(BaseModel):
     test_file_content: str = Field(..., description="The full Python code for the unit tests")
     test_file_name: str = Field(..., description="The suggested filename for the test (e.g., test_utils.py)")
 
+class TestCodeBatch(BaseModel):
+    tests: List[TestCode] = Field(..., description="One test file per source file, in the order given")
+
+TEST_REQUIREMENTS = (
+    "Requirements:\n"
+    "1. Use the 'unittest' framework.\n"
+    "2. Mock external dependencies (APIs, LLMs, Filesystem) using 'unittest.mock'.\n"
+    "3. Include at least one happy path and one error case for each public method.\n"
+    "4. Ensure imports are correct based on the file structure (src is top-level).\n"
+    "5. Respond ONLY with the JSON format specified."
+)
+
 class QualityAssuranceAgent(BaseAgent):
     """
     Agent responsible for generating test cases and ensuring code quality before push.
     """
     def __init__(self, agent_name: str = "QualityAssuranceAgent", config: Dict[str, Any] = None):
         super().__init__(agent_name, config)
-        self.llm = LLMInterface(model_name=self.config.get("model", "gpt-4o"))
+        self.llm = get_llm(self.config.get("model", "gpt-4o"))
+        # Persistent cache of extracted methods: path -> ((mtime_ns, size), methods)
+        self.cache_path = self.config.get("cache_path", os.path.join(".qa_cache", "methods.pkl"))
+        self._methods_cache: Dict[str, Tuple[Tuple[int, int], List[str]]] = self._load_methods_cache()
+
+    def _load_methods_cache(self) -> Dict[str, Tuple[Tuple[int, int], List[str]]]:
+        """Loads the method cache from disk, starting empty if missing or unreadable."""
+        try:
+            with open(self.cache_path, "rb") as f:
+                cache = pickle.load(f)
+            return cache if isinstance(cache, dict) else {}
+        except Exception:
+            return {}
+
+    def _save_methods_cache(self):
+        """Persists the method cache so the next scan only re-parses changed files."""
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            with open(self.cache_path, "wb") as f:
+                pickle.dump(self._methods_cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            self.logger.warning(f"Could not persist QA method cache: {e}")
 
     def scan_codebase(self, root_dir: str = "src") -> Dict[str, List[str]]:
         """
         Scans the codebase to find all public methods in classes.
         Returns a mapping of filename -> list of method names.
         """
+        paths = [p for p in _walk_py_files(root_dir) if os.path.basename(p) != "__init__.py"]
+
+        # Parse only files whose cache entry is stale, in parallel when there are many
+        misses = [p for p in paths if not self._is_cached(p)]
+        # Files the pool already failed on; already logged, so the serial pass doesn't parse them again
+        failed = set()
+        if len(misses) >= PARALLEL_PARSE_THRESHOLD:
+            with ProcessPoolExecutor() as executor:
+                for path, (file_key, methods, error) in zip(misses, executor.map(_extract_methods_static, misses, chunksize=16)):
+                    if error:
+                        self.logger.error(f"Error parsing {path}: {error}")
+                        failed.add(path)
+                    else:
+                        self._methods_cache[path] = (file_key, methods)
+
         methods_map = {}
-        for root, _, files in os.walk(root_dir):
-            for file in files:
-                if file.endswith(".py") and file != "__init__.py":
-                    path = os.path.join(root, file)
-                    methods = self._extract_methods(path)
-                    if methods:
-                        methods_map[path] = methods
+        for path in paths:
+            if path in failed:
+                continue
+            methods = self._extract_methods(path)
+            if methods:
+                methods_map[path] = methods
+        self._save_methods_cache()
         return methods_map
 
+    def _is_cached(self, filepath: str) -> bool:
+        """Checks whether the cached methods for a file are still valid."""
+        cached = self._methods_cache.get(filepath)
+        if not cached:
+            return False
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return False
+        return cached[0] == (st.st_mtime_ns, st.st_size)
+
     def _extract_methods(self, filepath: str) -> List[str]:
         """Extracts class names and method names from a Python file."""
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                node = ast.parse(f.read())
-            
-            methods = []
-            for item in node.body:
-                if isinstance(item, ast.ClassDef):
-                    class_name = item.name
-                    for subitem in item.body:
-                        if isinstance(subitem, ast.FunctionDef):
-                            if not subitem.name.startswith("_"):
-                                methods.append(f"{class_name}.{subitem.name}")
-                elif isinstance(item, ast.FunctionDef):
-                    if not item.name.startswith("_"):
-                        methods.append(item.name)
-            return methods
-        except Exception as e:
-            self.logger.error(f"Error parsing {filepath}: {e}")
+        if self._is_cached(filepath):
+            return list(self._methods_cache[filepath][1])
+
+        file_key, methods, error = _extract_methods_static(filepath)
+        if error:
+            self.logger.error(f"Error parsing {filepath}: {error}")
             return []
 
-    def find_existing_tests(self, test_dir: str = "tests") -> Set[str]:
-        """Scans tests directory to see which methods are already tested (roughly)."""
+        self._methods_cache[filepath] = (file_key, methods)
+        return list(methods)
+
+    def find_existing_tests(self, test_dir: str = "tests", method_names: Optional[Iterable[str]] = None) -> Set[str]:
+        """
+        Scans tests directory to see which methods are already tested (roughly).
+        Without method_names, returns the test file paths. With method_names, returns the
+        names mentioned in at least one test file (searched via mmap, without decoding files).
+        """
         tested_names = set()
         if not os.path.exists(test_dir):
             return tested_names
 
-        for root, _, files in os.walk(test_dir):
-            for file in files:
-                if file.endswith(".py"):
-                    path = os.path.join(root, file)
-                    try:
-                        with open(path, "r", encoding="utf-8") as f:
-                            content = f.read()
-                            # Deep search for mention of method names
-                            # This is a heuristic: if a test file mentions 'Agent.process', we assume it's tested.
-                            tested_names.add(path)
-                    except: pass
+        pending = {name: name.encode("utf-8") for name in method_names} if method_names is not None else None
+        for path in _walk_py_files(test_dir):
+            if pending is None:
+                tested_names.add(path)
+                continue
+            if not pending:
+                break
+            try:
+                with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    # Deep search for mention of method names
+                    # This is a heuristic: if a test file mentions 'Agent.process', we assume it's tested.
+                    for name, needle in list(pending.items()):
+                        if mm.find(needle) != -1:
+                            tested_names.add(name)
+                            del pending[name]
+            except (OSError, ValueError):
+                # Unreadable or empty file (mmap rejects zero-length files)
+                pass
         return tested_names
 
     def generate_tests_for_file(self, target_file: str) -> bool:
@@ -90,30 +200,92 @@ class QualityAssuranceAgent(BaseAgent):
                 f"I need high-quality Python unit tests for the following code:\n\n"
                 f"FILE: {target_file}\n\n"
                 f"CODE:\n{code_content}\n\n"
-                f"Requirements:\n"
-                f"1. Use the 'unittest' framework.\n"
-                f"2. Mock external dependencies (APIs, LLMs, Filesystem) using 'unittest.mock'.\n"
-                f"3. Include at least one happy path and one error case for each public method.\n"
-                f"4. Ensure imports are correct based on the file structure (src is top-level).\n"
-                f"5. Respond ONLY with the JSON format specified."
+                f"{TEST_REQUIREMENTS}"
             )
 
             test_data = self.llm.generate_structured_output(prompt, TestCode)
-            
-            test_dir = "tests"
-            if not os.path.exists(test_dir):
-                os.makedirs(test_dir)
-            
-            dest_path = os.path.join(test_dir, test_data.test_file_name)
-            with open(dest_path, "w", encoding="utf-8") as f:
-                f.write(test_data.test_file_content)
-            
-            self.logger.info(f"✅ Tests generated at: {dest_path}")
+            self._write_test_file(test_data)
             return True
         except Exception as e:
             self.logger.error(f"Failed to generate tests for {target_file}: {e}")
             return False
 
+    def generate_tests_for_files(self, target_files: List[str], batch_size: int = 4,
+                                 max_batch_chars: int = 24000, max_concurrency: int = 2) -> Dict[str, bool]:
+        """
+        Generates unit tests for several source files, packing up to `batch_size` files
+        (bounded by `max_batch_chars` of source) into each LLM request and keeping up to
+        `max_concurrency` requests in flight. Returns a mapping of file -> success.
+        """
+        batches: List[List[Tuple[str, str]]] = []
+        current: List[Tuple[str, str]] = []
+        current_chars = 0
+        results: Dict[str, bool] = {}
+        for target_file in target_files:
+            try:
+                with open(target_file, "r", encoding="utf-8") as f:
+                    code_content = f.read()
+            except Exception as e:
+                self.logger.error(f"Failed to read {target_file}: {e}")
+                results[target_file] = False
+                continue
+            if current and (len(current) >= batch_size or current_chars + len(code_content) > max_batch_chars):
+                batches.append(current)
+                current, current_chars = [], 0
+            current.append((target_file, code_content))
+            current_chars += len(code_content)
+        if current:
+            batches.append(current)
+
+        async def run_batches():
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def run_one(batch):
+                async with semaphore:
+                    return await asyncio.to_thread(self._generate_tests_batch, batch)
+
+            return await asyncio.gather(*(run_one(b) for b in batches))
+
+        for batch_results in asyncio.run(run_batches()):
+            results.update(batch_results)
+        return results
+
+    def _generate_tests_batch(self, batch: List[Tuple[str, str]]) -> Dict[str, bool]:
+        """Requests tests for a group of files in a single structured LLM call."""
+        files = [path for path, _ in batch]
+        self.logger.info(f"Generating tests for {len(files)} files in one request: {', '.join(files)}...")
+        try:
+            sections = "\n\n".join(f"FILE: {path}\n\nCODE:\n{code}" for path, code in batch)
+            prompt = (
+                f"I need high-quality Python unit tests for each of the following {len(batch)} files. "
+                f"Return one test file per source file, in the same order.\n\n"
+                f"{sections}\n\n"
+                f"{TEST_REQUIREMENTS}"
+            )
+
+            test_batch = self.llm.generate_structured_output(prompt, TestCodeBatch)
+            for test_data in test_batch.tests:
+                self._write_test_file(test_data)
+
+            # Files the model skipped are reported as failures
+            return {path: i < len(test_batch.tests) for i, path in enumerate(files)}
+        except Exception as e:
+            self.logger.error(f"Failed to generate tests for {', '.join(files)}: {e}")
+            return {path: False for path in files}
+
+    def _write_test_file(self, test_data: TestCode) -> str:
+        """Writes a generated test file into the tests directory."""
+        test_dir = "tests"
+        if not os.path.exists(test_dir):
+            os.makedirs(test_dir)
+        
+        dest_path = os.path.join(test_dir, test_data.test_file_name)
+        with open(dest_path, "w", encoding="utf-8") as f:
+            f.write(test_data.test_file_content)
+        
+        self.logger.info(f"✅ Tests generated at: {dest_path}")
+        return dest_path
+
     def run_all_checks(self) -> bool:
         """
         Runs all quality checks: Syntax, Static Analysis, and Unit Tests.
@@ -121,22 +293,25 @@ class QualityAssuranceAgent(BaseAgent):
         """
         self.logger.info("🚀 Running Quality Assurance Checks...")
         
-        # 1. Syntax Check
-        try:
-            subprocess.run([sys.executable, "-m", "compileall", "src"], check=True, capture_output=True)
+        # 1. Syntax Check (in-memory compiles, so each error message is kept for the report)
+        syntax_errors = check_syntax([str(p) for p in Path("src").rglob("*.py")])
+        if not syntax_errors:
             self.logger.info("✅ Syntax Check Passed.")
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"❌ Syntax Check Failed:\n{e.stderr.decode()}")
+        else:
+            self.logger.error("❌ Syntax Check Failed:\n" + "\n".join(syntax_errors))
             return False
 
-        # 2. Run Unit Tests (Existing)
+        # 2. Run Unit Tests (Existing). Isolated by default so test imports and monkeypatches
+        # can't leak into this process; in_process_tests=True trades that for a faster start.
         try:
-            # discover returns 0 if all tests pass
-            result = subprocess.run([sys.executable, "-m", "unittest", "discover", "tests"], capture_output=True, text=True)
-            if result.returncode == 0:
+            if self.config.get("in_process_tests", False):
+                tests_ok, output = self._run_tests_in_process()
+            else:
+                tests_ok, output = self._run_tests_subprocess()
+            if tests_ok:
                 self.logger.info("✅ Unit Tests Passed.")
             else:
-                self.logger.error(f"❌ Unit Tests Failed:\n{result.stdout}\n{result.stderr}")
+                self.logger.error(f"❌ Unit Tests Failed:\n{output}")
                 return False
         except Exception as e:
             self.logger.error(f"Error running tests: {e}")
@@ -144,6 +319,37 @@ class QualityAssuranceAgent(BaseAgent):
 
         return True
 
+    def _run_tests_in_process(self, test_dir: str = "tests") -> Tuple[bool, str]:
+        """
+        Discovers and runs the unit tests in this interpreter, avoiding a fresh Python startup.
+        Opt-in only: whatever the tests import or patch stays in this process afterwards.
+        """
+        stream = io.StringIO()
+        suite = unittest.TestLoader().discover(test_dir)
+        result = unittest.TextTestRunner(stream=stream, verbosity=1).run(suite)
+        return result.wasSuccessful(), stream.getvalue()
+
+    def _run_tests_subprocess(self, test_dir: str = "tests") -> Tuple[bool, str]:
+        """
+        Runs the unit tests in a separate interpreter (the default), isolated from this process.
+        Output is streamed line by line; only the last lines are kept for the failure report.
+        """
+        # discover returns 0 if all tests pass
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "unittest", "discover", test_dir],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1
+        )
+        tail = deque(maxlen=200)
+        for line in proc.stdout:
+            line = line.rstrip()
+            self.logger.info(line)
+            tail.append(line)
+        returncode = proc.wait()
+        return returncode == 0, "\n".join(tail)
+
     def process(self, input_data: Any = None) -> bool:
         """Main entry point."""
         return self.run_all_checks()
@@ -152,12 +358,14 @@ if __name__ == "__main__":
     # Simple CLI for the agent
     import argparse
     parser = argparse.ArgumentParser()
-    parser.add_argument("--gen", help="Generate tests for a specific file")
+    parser.add_argument("--gen", nargs="+", help="Generate tests for one or more files")
     args = parser.parse_args()
     
     agent = QualityAssuranceAgent()
-    if args.gen:
-        agent.generate_tests_for_file(args.gen)
+    if args.gen and len(args.gen) == 1:
+        agent.generate_tests_for_file(args.gen[0])
+    elif args.gen:
+        agent.generate_tests_for_files(args.gen)
     else:
         success = agent.run_all_checks()
         sys.exit(0 if success else 1)
@@ -1,12 +1,36 @@
 import logging
 import time
+import random
+import asyncio
+import inspect
 import functools
 import os
 from typing import Any, Dict, List, Optional, Callable, Type, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from pydantic import ValidationError
 from src.core.agent import BaseAgent
 
 logger = logging.getLogger(__name__)
 
+# Errors that will fail the same way on every attempt, so retrying only burns the backoff budget:
+# - pydantic ValidationError: the output didn't match the schema (LLMInterface already re-prompts internally)
+# - OpenAI/LiteLLM AuthenticationError (401) and PermissionDeniedError (403): bad or missing credentials
+# Everything else (connection drops, timeouts, RateLimitError, 5xx) is treated as recoverable.
+UNRECOVERABLE_EXCEPTIONS: Tuple[Type[Exception], ...] = (ValidationError,)
+try:
+    # LiteLLM's exceptions subclass these, so both clients are covered
+    from openai import AuthenticationError, PermissionDeniedError
+    UNRECOVERABLE_EXCEPTIONS += (AuthenticationError, PermissionDeniedError)
+except ImportError:
+    pass
+
+OLLAMA_TAGS_URL = "http://localhost:11434/api/tags"
+
+# One pooled keep-alive connection reused by every health probe
+_http = requests.Session()
+_http.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+
 class ResilienceAgent(BaseAgent):
     """
     Agent responsible for making the repository and pipeline failure-proof.
@@ -16,6 +40,14 @@ class ResilienceAgent(BaseAgent):
         super().__init__(agent_name, config)
         self.max_retries = self.config.get("max_retries", 3)
         self.backoff_factor = self.config.get("backoff_factor", 2)
+        # Randomized spread on each backoff step so concurrent workers don't retry in lockstep
+        self.jitter = self.config.get("jitter", 0.5)
+        self.max_delay = self.config.get("max_delay", 30)
+        # Health probes are cached briefly so frequent polling collapses into one probe per window
+        self._health_ttl = self.config.get("health_ttl", 1.0)
+        self._cached_health: Optional[Dict[str, Any]] = None
+        self._cached_at = 0.0
+        self.probe_timeout = self.config.get("probe_timeout", 0.3)
         self.model_hierarchy = [
             "gpt-4o",
             "gpt-4-turbo",
@@ -24,32 +56,56 @@ class ResilienceAgent(BaseAgent):
             "mock"
         ]
 
-    def retry(self, exceptions: Tuple[Type[Exception], ...] = (Exception,), 
+    def retry(self, recoverable: Tuple[Type[Exception], ...] = (Exception,),
+              unrecoverable: Tuple[Type[Exception], ...] = UNRECOVERABLE_EXCEPTIONS,
               tries: int = 3, delay: int = 1, backoff: int = 2):
         """
-        Retry decorator with exponential backoff.
+        Retry decorator with jittered exponential backoff:
+        sleep = min(max_delay, delay * backoff**attempt * (1 + U(0, jitter))).
+        `unrecoverable` exceptions are raised immediately, even if they also match `recoverable`.
         """
+        def backoff_for(attempt: int, error: Exception) -> float:
+            sleep_for = min(self.max_delay, delay * (backoff ** attempt) * (1 + random.random() * self.jitter))
+            msg = f"{str(error)}, Retrying in {sleep_for:.2f} seconds..."
+            self.logger.warning(msg)
+            return sleep_for
+
         def decorator_retry(func: Callable):
+            if inspect.iscoroutinefunction(func):
+                # Coroutines back off with asyncio.sleep so other tasks keep running meanwhile
+                @functools.wraps(func)
+                async def async_wrapper_retry(*args, **kwargs):
+                    for attempt in range(tries - 1):
+                        try:
+                            return await func(*args, **kwargs)
+                        except unrecoverable:
+                            raise
+                        except recoverable as e:
+                            await asyncio.sleep(backoff_for(attempt, e))
+                    return await func(*args, **kwargs)
+                return async_wrapper_retry
+
             @functools.wraps(func)
             def wrapper_retry(*args, **kwargs):
-                mtries, mdelay = tries, delay
-                while mtries > 1:
+                for attempt in range(tries - 1):
                     try:
                         return func(*args, **kwargs)
-                    except exceptions as e:
-                        msg = f"{str(e)}, Retrying in {mdelay} seconds..."
-                        self.logger.warning(msg)
-                        time.sleep(mdelay)
-                        mtries -= 1
-                        mdelay *= backoff
+                    except unrecoverable:
+                        raise
+                    except recoverable as e:
+                        time.sleep(backoff_for(attempt, e))
                 return func(*args, **kwargs)
             return wrapper_retry
         return decorator_retry
 
-    def check_system_health(self) -> Dict[str, Any]:
+    def check_system_health(self, force: bool = False) -> Dict[str, Any]:
         """
         Performs a comprehensive health check of the environment.
+        Results are reused for `health_ttl` seconds unless `force` is set.
         """
+        if not force and self._cached_health is not None and time.monotonic() - self._cached_at < self._health_ttl:
+            return self._cached_health
+
         health = {
             "status": "healthy",
             "checks": {}
@@ -71,15 +127,20 @@ class ResilienceAgent(BaseAgent):
         if missing_vars:
              health["status"] = "degraded"
 
-        # 3. Check LLM Local Backend
-        import requests
+        # 3. Check LLM Local Backend (HEAD only needs the status line, no body download)
         try:
-            resp = requests.get("http://localhost:11434/api/tags", timeout=2)
+            resp = _http.head(OLLAMA_TAGS_URL, timeout=self.probe_timeout)
+            if resp.status_code == 405:
+                # Older servers without a HEAD route: GET, but don't read the body
+                resp = _http.get(OLLAMA_TAGS_URL, timeout=self.probe_timeout, stream=True)
+                resp.close()
             health["checks"]["local_llm"] = "Ollama Online" if resp.status_code == 200 else "Ollama Offline"
-        except:
+        except requests.exceptions.RequestException:
             health["checks"]["local_llm"] = "Ollama Not Reachable"
 
         self.logger.info(f"System Health Check Results: {health}")
+        self._cached_health = health
+        self._cached_at = time.monotonic()
         return health
 
     def get_fallback_model(self, failing_model: str) -> str:
@@ -110,6 +171,7 @@ def get_resilience_agent() -> ResilienceAgent:
         _resilience_instance = ResilienceAgent()
     return _resilience_instance
 
-def safe_retry(tries=3, delay=1, backoff=2, exceptions=(Exception,)):
+def safe_retry(tries=3, delay=1, backoff=2, recoverable=(Exception,), unrecoverable=UNRECOVERABLE_EXCEPTIONS):
     """Simple wrapper for using the resilience agent's retry as a decorator."""
-    return get_resilience_agent().retry(tries=tries, delay=delay, backoff=backoff, exceptions=exceptions)
+    return get_resilience_agent().retry(recoverable=recoverable, unrecoverable=unrecoverable,
+                                        tries=tries, delay=delay, backoff=backoff)
@@ -1,12 +1,100 @@
 import os
 import re
+import mmap
+import sys
 import json
 import logging
-from typing import Any, Dict, List, Optional
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from src.core.agent import BaseAgent
 
 logger = logging.getLogger(__name__)
 
+# All tracing patterns fused into one alternation; the named group that matched tells us which event it is.
+# Only used as a fallback for lines that don't follow the standard log layout (see `_parse_line`).
+# The timestamp prefix is optional so retries logged without one are still counted.
+# Compiled once at import; re.ASCII keeps \d on the plain-digit fast path.
+_COMBINED = re.compile(
+    r"(?:(?P<ts>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}).*?)?"
+    r"(?:Attempt (?P<att>\d+)/\d+ failed: (?P<err>.+)"
+    r"|LLM Request \(Attempt \d+/\d+\) using (?P<model>.+?)\.\.\."
+    r"|Starting execution for (?P<start>.+?)\.\.\."
+    r"|Execution handling complete for (?P<end>.+?)\.)",
+    re.ASCII
+)
+
+# Log lines follow the BaseAgent format: "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+_FIELD_SEP = " - "
+_TS_LEN = len("YYYY-MM-DD HH:MM:SS")
+_START_PREFIX = "Starting execution for "
+_END_PREFIX = "Execution handling complete for "
+_LLM_PREFIX = "LLM Request (Attempt "
+_RETRY_PREFIX = "Attempt "
+_TS_DIGITS = (0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18)
+_TS_SEPARATORS = ((4, "-"), (7, "-"), (10, " "), (13, ":"), (16, ":"))
+
+def _is_timestamp(s: str) -> bool:
+    """Checks the fixed 'YYYY-MM-DD HH:MM:SS' layout (digits and separators) before it is sliced."""
+    return (len(s) >= _TS_LEN
+            and all(s[i] == sep for i, sep in _TS_SEPARATORS)
+            and all("0" <= s[i] <= "9" for i in _TS_DIGITS))
+
+def _parse_message(msg: str) -> Optional[Tuple[str, str, Optional[str]]]:
+    """
+    Classifies a log message by its fixed prefix without touching the regex engine.
+    Returns (kind, value, extra) with kind one of "start", "end", "llm", "retry", or None.
+    """
+    if msg.startswith(_START_PREFIX):
+        name, sep, _ = msg[len(_START_PREFIX):].partition("...")
+        return ("start", name, None) if sep and name else None
+    if msg.startswith(_END_PREFIX):
+        name, sep, _ = msg[len(_END_PREFIX):].partition(".")
+        return ("end", name, None) if sep and name else None
+    if msg.startswith(_LLM_PREFIX):
+        _, sep, rest = msg.partition(") using ")
+        model, sep2, _ = rest.partition("...")
+        return ("llm", model, None) if sep and sep2 and model else None
+    if msg.startswith(_RETRY_PREFIX):
+        counter, sep, error = msg[len(_RETRY_PREFIX):].partition(" failed: ")
+        attempt, slash, total = counter.partition("/")
+        if sep and slash and error and attempt.isdigit() and total.isdigit():
+            return ("retry", attempt, error)
+    return None
+
+def _parse_line(line: str) -> Optional[Tuple[str, Optional[str], str, Optional[str]]]:
+    """
+    Parses one log line into (kind, timestamp, value, extra), or None if it carries no traced event.
+    Uses plain splits for well-formed lines and only falls back to `_COMBINED` for odd retry lines.
+    """
+    parts = line.split(_FIELD_SEP, 3)
+    if len(parts) == 4:
+        event = _parse_message(parts[3].rstrip("\r\n"))
+        if event is not None:
+            # Loggers with a custom format may put something else first; such events carry no timestamp
+            ts = parts[0][:_TS_LEN] if _is_timestamp(parts[0]) else None
+            return (event[0], ts) + event[1:]
+
+    if "Attempt" not in line:
+        return None
+    match = _COMBINED.search(line)
+    if not match:
+        return None
+    ts = match.group("ts")
+    if match.group("att") is not None:
+        return ("retry", ts, match.group("att"), match.group("err"))
+    if match.group("model") is not None:
+        return ("llm", ts, match.group("model"), None)
+    if match.group("start") is not None:
+        return ("start", ts, match.group("start"), None)
+    return ("end", ts, match.group("end"), None)
+
+def _parse_timestamp(ts: str) -> datetime:
+    """Parses a fixed-layout 'YYYY-MM-DD HH:MM:SS' timestamp by slicing, much faster than strptime."""
+    return datetime(int(ts[0:4]), int(ts[5:7]), int(ts[8:10]), int(ts[11:13]), int(ts[14:16]), int(ts[17:19]))
+
+# Upper bound on started-but-unfinished stages tracked while parsing
+MAX_ACTIVE_STAGES = 1024
+
 class TelemetryAgent(BaseAgent):
     """
     Agent specialized in analyzing logs, tracing the pipeline execution,
@@ -32,88 +120,134 @@ class TelemetryAgent(BaseAgent):
             self.logger.error(f"Log file not found: {log_path}")
             return {"error": "Log file not found"}
 
-        with open(log_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-
-        # Regex patterns for tracing
-        patterns = {
-            "retry": re.compile(r"Attempt (\d+)/\d+ failed: (.+)"),
-            "llm_request": re.compile(r"LLM Request \(Attempt \d+/\d+\) using (.+?)\.\.\."),
-            "execution_start": re.compile(r"Starting execution for (.+?)\.\.\."),
-            "execution_complete": re.compile(r"Execution handling complete for (.+?)\."),
-            "timestamp": re.compile(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})")
-        }
-
         trace = []
         active_stages = {}
 
-        for line in lines:
+        # Reports are about the most recent run, so by default only the tail of the log is scanned.
+        # Set tail_bytes to 0/None for a full forensic scan.
+        tail_bytes = self.config.get("tail_bytes", 4_000_000)
+        # The traced tokens always sit near the start of a line; long JSON payloads or stack traces
+        # after them are never scanned. Set line_scan_bytes to 0/None to scan whole lines.
+        scan_bytes = self.config.get("line_scan_bytes", 256)
+        for raw in self._iter_tail_lines(log_path, tail_bytes):
+            head = raw[:scan_bytes] if scan_bytes else raw
+            # Cheap substring prefilter on the raw bytes: most lines carry none of the traced tokens,
+            # so only the survivors are decoded
+            if not (b"Attempt " in head or b"LLM Request" in head or b"execution for" in head or b"complete for" in head):
+                continue
+            event = _parse_line(head.decode("utf-8", errors="replace"))
+            if event is None:
+                continue
+            kind, ts, value, extra = event
+
             # 1. Capture Retries
-            retry_match = patterns["retry"].search(line)
-            if retry_match:
+            if kind == "retry":
+                # Error messages and context keep the full line, not just the scanned head
+                line = raw.decode("utf-8", errors="replace")
+                if len(head) < len(raw):
+                    extra = line.partition(" failed: ")[2].rstrip("\r\n") or extra
                 self.metrics["retries"] += 1
                 self.metrics["errors"].append({
-                    "attempt": retry_match.group(1),
-                    "error": retry_match.group(2),
+                    "attempt": value,
+                    # The same error tends to repeat many times; interning makes the set/compare work cheap
+                    "error": sys.intern(extra),
                     "context": line.strip()
                 })
+                continue
+
+            if kind == "llm":
+                self.metrics["llm_stats"][value] = self.metrics["llm_stats"].get(value, 0) + 1
+                continue
 
             # 2. Trace Latency
-            ts_match = patterns["timestamp"].search(line)
-            if ts_match:
-                ts = ts_match.group(1)
-                
-                start_match = patterns["execution_start"].search(line)
-                if start_match:
-                    agent = start_match.group(1)
-                    active_stages[agent] = ts
-                
-                end_match = patterns["execution_complete"].search(line)
-                if end_match:
-                    agent = end_match.group(1)
-                    if agent in active_stages:
-                        # Simple latency calculation would go here if we parsed timestamps to datetime
-                        trace.append({
-                            "agent": agent,
-                            "start": active_stages[agent],
-                            "end": ts
-                        })
-                        del active_stages[agent]
+            if ts is None:
+                continue
+
+            # The layout is checked in `_parse_line`, but an impossible date (month 13) still fails here
+            try:
+                dt = _parse_timestamp(ts)
+            except ValueError:
+                continue
+
+            if kind == "start":
+                # Stages that never complete (crashed runs) would pile up; evict the oldest past the cap
+                active_stages.pop(value, None)
+                if len(active_stages) >= MAX_ACTIVE_STAGES:
+                    active_stages.pop(next(iter(active_stages)))
+                active_stages[value] = (ts, dt)
+            elif value in active_stages:
+                start_ts, start_dt = active_stages.pop(value)
+                duration = (dt - start_dt).total_seconds()
+                trace.append({
+                    "agent": value,
+                    "start": start_ts,
+                    "end": ts,
+                    "duration_s": duration
+                })
+                self.metrics["stage_latency"][value] = self.metrics["stage_latency"].get(value, 0.0) + duration
 
         report = self.generate_report(trace)
         return report
 
+    @staticmethod
+    def _iter_tail_lines(log_path: str, tail_bytes: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Streams the log line by line through a read-only mmap, so resident memory stays flat
+        regardless of the log size. With `tail_bytes`, only the last `tail_bytes` of the file are
+        scanned (the partial first line is dropped); a falsy value scans the whole file.
+        """
+        with open(log_path, "rb") as fh:
+            size = os.fstat(fh.fileno()).st_size
+            if size == 0:
+                return  # mmap refuses empty files
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if tail_bytes and size > tail_bytes:
+                    mm.seek(size - tail_bytes - 1)
+                    # Discard up to the end of the line we landed in (a no-op if we landed on a newline)
+                    mm.readline()
+                yield from iter(mm.readline, b"")
+
     def generate_report(self, trace: List[Dict]) -> Dict[str, Any]:
         """
         Generates a summary report with actionable insights.
         """
+        # Each aggregate is computed once and shared
+        hallucinations = self._audit_hallucinations()
         report = {
             "summary": {
                 "total_retries": self.metrics["retries"],
-                "unique_errors": len(set(e["error"] for e in self.metrics["errors"])),
-                "agents_involved": [t["agent"] for t in trace]
+                "unique_errors": len({e["error"] for e in self.metrics["errors"]}),
+                "agents_involved": sorted({t["agent"] for t in trace})
             },
             "tracing": trace,
             "top_bottlenecks": self._identify_bottlenecks(trace),
-            "hallucination_audit": self._audit_hallucinations(),
-            "actionable_improvements": self._suggest_improvements()
+            "hallucination_audit": hallucinations,
+            "actionable_improvements": self._suggest_improvements(hallucinations)
         }
         return report
 
-    def _identify_bottlenecks(self, trace: List[Dict]) -> List[str]:
-        # Placeholder for more complex analytics
-        return ["Slowest agents: " + ", ".join(set(t["agent"] for t in trace))]
+    def _identify_bottlenecks(self, trace: List[Dict], top_n: int = 5) -> List[str]:
+        # Longest single run per agent, slowest first
+        slowest: Dict[str, float] = {}
+        for t in trace:
+            if t["duration_s"] > slowest.get(t["agent"], -1.0):
+                slowest[t["agent"]] = t["duration_s"]
+        ranked = sorted(slowest.items(), key=lambda item: item[1], reverse=True)[:top_n]
+        if not ranked:
+            return []  # No stage both started and completed in the scanned log
+        return ["Slowest agents: " + ", ".join(f"{agent} ({duration:.1f}s)" for agent, duration in ranked)]
 
     def _audit_hallucinations(self) -> List[str]:
         hallucinations = [e["error"] for e in self.metrics["errors"] if "validation error" in e["error"].lower()]
         return hallucinations
 
-    def _suggest_improvements(self) -> List[str]:
+    def _suggest_improvements(self, hallucinations: Optional[List[str]] = None) -> List[str]:
         suggestions = []
         if self.metrics["retries"] > 5:
             suggestions.append("High retry count detected. Consider improving system prompts or increasing model capability.")
         
-        hallucinations = self._audit_hallucinations()
+        if hallucinations is None:
+            hallucinations = self._audit_hallucinations()
         if any("dialogue" in h.lower() for h in hallucinations):
             suggestions.append("Llama models often struggle with 'dialogue' lists. Consider flatter schema structures.")
             
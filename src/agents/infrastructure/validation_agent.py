@@ -2,12 +2,40 @@ import logging
 import os
 import sys
 import subprocess
-from typing import Dict, Any, List
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional
 from src.core.agent import BaseAgent
 from src.core.models import ComicScript
 
 logger = logging.getLogger(__name__)
 
+# Below this many files, worker start-up costs more than compiling serially
+PARALLEL_SYNTAX_THRESHOLD = 32
+
+def _check_file_syntax(path: str) -> Optional[str]:
+    """
+    Compiles one file in memory (no .pyc written). Returns the error message, or None if it compiles.
+    """
+    try:
+        with open(path, "rb") as f:
+            source = f.read()
+        compile(source, path, "exec", dont_inherit=True)
+        return None
+    except (SyntaxError, ValueError) as e:
+        return f"{path}: {e}"
+
+def check_syntax(paths: List[str]) -> List[str]:
+    """
+    Compiles the given files in memory and returns one error message per file that fails.
+    Large batches are spread across a process pool; each file is independent.
+    """
+    if len(paths) >= PARALLEL_SYNTAX_THRESHOLD:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = executor.map(_check_file_syntax, paths, chunksize=8)
+            return [err for err in results if err]
+    return [err for err in map(_check_file_syntax, paths) if err]
+
 class ValidationAgent(BaseAgent):
     """
     Agent responsible for validating the codebase and pipeline integrity.
@@ -21,15 +49,16 @@ class ValidationAgent(BaseAgent):
         Runs a syntax check (compile-only) on all Python files in the directory.
         """
         logger.info(f"Running syntax check on directory: {directory}")
-        try:
-            # -m compileall -q: compiles all files quietly
-            # returns non-zero if any file fails to compile
-            subprocess.run([sys.executable, "-m", "compileall", "-q", directory], check=True)
-            logger.info("✅ Syntax check passed.")
-            return True
-        except subprocess.CalledProcessError:
+        # Compile in-process instead of spawning `python -m compileall`: no interpreter start-up
+        # and no __pycache__ writes
+        errors = check_syntax([str(p) for p in Path(directory).rglob("*.py")])
+        if errors:
+            for err in errors:
+                logger.error(err)
             logger.error("❌ Syntax check failed. Please fix syntax errors before pushing.")
             return False
+        logger.info("✅ Syntax check passed.")
+        return True
 
     def run_dry_run(self) -> bool:
         """
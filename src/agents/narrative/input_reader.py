@@ -1,30 +1,47 @@
 import os
-from typing import List, Dict, Any
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Tuple
 from pypdf import PdfReader
 import docx
+from docx.opc.exceptions import PackageNotFoundError
 from src.core.agent import BaseAgent
 
+_WORD_RE = re.compile(r"\S+")
+
+# Below this many pages, re-opening the PDF in worker processes costs more than it saves
+PARALLEL_PDF_PAGE_THRESHOLD = 16
+
+def _extract_page_range(args: Tuple[str, int, int]) -> str:
+    """
+    Extracts pages [start, stop) of a PDF. Runs in a worker process, so it re-opens the file itself.
+    """
+    path, start, stop = args
+    reader = PdfReader(path)
+    return "".join((reader.pages[i].extract_text() or "") + "\n" for i in range(start, stop))
+
 class InputReaderAgent(BaseAgent):
+    def __init__(self, agent_name: str = "InputReader", config: Dict[str, Any] = None):
+        super().__init__(agent_name, config)
+        self._readers = {
+            '.txt': self._read_text,
+            '.pdf': self._read_pdf,
+            '.docx': self._read_docx,
+        }
+
     def process(self, input_path: str) -> str:
         """
         Reads a file and returns its text content.
         Supported formats: .txt, .pdf, .docx
         """
         self.logger.info(f"Reading input file: {input_path}")
-        
-        if not os.path.exists(input_path):
-            raise FileNotFoundError(f"Input file not found: {input_path}")
 
         ext = os.path.splitext(input_path)[1].lower()
-
-        if ext == '.txt':
-            return self._read_text(input_path)
-        elif ext == '.pdf':
-            return self._read_pdf(input_path)
-        elif ext == '.docx':
-            return self._read_docx(input_path)
-        else:
+        reader = self._readers.get(ext)
+        if reader is None:
             raise ValueError(f"Unsupported file format: {ext}")
+        # No separate exists() check: each reader's open() raises FileNotFoundError itself
+        return reader(input_path)
 
     def _read_text(self, path: str) -> str:
         with open(path, 'r', encoding='utf-8') as f:
@@ -32,13 +49,27 @@ class InputReaderAgent(BaseAgent):
 
     def _read_pdf(self, path: str) -> str:
         reader = PdfReader(path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+        num_pages = len(reader.pages)
+        if num_pages < PARALLEL_PDF_PAGE_THRESHOLD:
+            # Single join instead of repeated `+=`; extract_text() can return None for image-only pages
+            return "".join((page.extract_text() or "") + "\n" for page in reader.pages)
+
+        # pypdf text extraction is pure Python and holds the GIL, so use processes rather than threads.
+        # Each worker gets one contiguous page range to keep the per-worker re-parse of the PDF to one.
+        workers = max(1, min(self.config.get("max_workers", os.cpu_count()) or 1, num_pages))
+        step = -(-num_pages // workers)
+        ranges = [(path, start, min(start + step, num_pages)) for start in range(0, num_pages, step)]
+        with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+            return "".join(executor.map(_extract_page_range, ranges))
 
     def _read_docx(self, path: str) -> str:
-        doc = docx.Document(path)
+        try:
+            doc = docx.Document(path)
+        except PackageNotFoundError:
+            # python-docx reports a missing path as a bad package; surface it like the other readers
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Input file not found: {path}")
+            raise
         return "\n".join([para.text for para in doc.paragraphs])
 
     def chunk_text(self, text: str, max_words: int = 2000) -> List[str]:
@@ -47,25 +78,36 @@ class InputReaderAgent(BaseAgent):
         For Phase 2 enhancement, this now attempts to respect paragraph boundaries and potentially
         uses an LLM to find scene breaks if the text is very long.
         """
-        # Simple paragraph-based chunking for now to avoid breaking sentences
-        paragraphs = text.split('\n\n')
+        # Simple paragraph-based chunking for now to avoid breaking sentences.
+        # Paragraphs are walked by offset and each chunk is sliced out of `text` once at flush,
+        # rather than splitting every paragraph into its own string and re-joining them.
         chunks = []
-        current_chunk = []
+        chunk_start = 0   # offset of the first paragraph in the current chunk
+        chunk_end = -1    # end offset of its last paragraph; -1 while the chunk is empty
         current_count = 0
-        
-        for para in paragraphs:
-            para_words = len(para.split())
+        text_len = len(text)
+        pos = 0
+
+        while True:
+            end = text.find('\n\n', pos)
+            if end == -1:
+                end = text_len
+            # Count words without materializing a token list per paragraph
+            para_words = sum(1 for _ in _WORD_RE.finditer(text, pos, end)) if end > pos else 0
             if current_count + para_words > max_words:
-                chunks.append("\n\n".join(current_chunk))
-                current_chunk = [para]
+                if chunk_end >= 0:
+                    chunks.append(text[chunk_start:chunk_end])
+                chunk_start = pos
                 current_count = para_words
             else:
-                current_chunk.append(para)
                 current_count += para_words
-        
-        if current_chunk:
-            chunks.append("\n\n".join(current_chunk))
-            
+            chunk_end = end
+
+            if end == text_len:
+                break
+            pos = end + 2
+
+        chunks.append(text[chunk_start:chunk_end])
         return chunks
 
     def detect_scenes(self, text_chunk: str, llm_interface) -> List[str]:
@@ -1,20 +1,11 @@
+import asyncio
 from typing import Any, Dict, List
 from src.core.agent import BaseAgent
 from src.core.models import ComicScript
-from src.utils.llm_interface import LLMInterface
+from src.utils.llm_interface import get_llm
 
-class ScriptWriterAgent(BaseAgent):
-    def __init__(self, agent_name: str = "ScriptWriter", config: Dict[str, Any] = None):
-        super().__init__(agent_name, config)
-        self.llm = LLMInterface(model_name=config.get("model_name", "gpt-4o"))
-
-    def process(self, input_text: str) -> ComicScript:
-        """
-        Converts raw text into a structured ComicScript.
-        """
-        self.logger.info("Generating comic script from text...")
-        
-        system_prompt = """
+# Static system prompt, built once at import rather than on every call
+_SYSTEM_PROMPT = """
         You are an expert comic book writer. Adapt the provided story into a structured comic book script.
         
         Guidelines:
@@ -57,20 +48,60 @@ class ScriptWriterAgent(BaseAgent):
           ]
         }
         """
-        
-        user_prompt = f"""
-        Adapt the following text into a comic book script:
-        
-        {input_text}
+
+class ScriptWriterAgent(BaseAgent):
+    def __init__(self, agent_name: str = "ScriptWriter", config: Dict[str, Any] = None):
+        super().__init__(agent_name, config)
+        self.llm = get_llm(config.get("model_name", "gpt-4o"))
+
+    def process(self, input_text: str) -> ComicScript:
+        """
+        Converts raw text into a structured ComicScript.
         """
+        self.logger.info("Generating comic script from text...")
         
         try:
             script = self.llm.generate_structured_output(
-                prompt=user_prompt,
-                system_prompt=system_prompt,
+                prompt=self._build_prompt(input_text),
+                system_prompt=_SYSTEM_PROMPT,
                 schema=ComicScript
             )
             return script
         except Exception as e:
             self.logger.error(f"Failed to generate script: {e}")
             raise
+
+    async def aprocess(self, input_text: str) -> ComicScript:
+        """
+        Async version of `process`; the LLM call doesn't block the event loop.
+        """
+        self.logger.info("Generating comic script from text...")
+
+        try:
+            return await self.llm.agenerate_structured_output(
+                prompt=self._build_prompt(input_text),
+                system_prompt=_SYSTEM_PROMPT,
+                schema=ComicScript
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to generate script: {e}")
+            raise
+
+    async def aprocess_all(self, input_texts: List[str]) -> List[ComicScript]:
+        """
+        Scripts several text chunks concurrently; `llm_concurrency` (default 5) bounds the in-flight requests.
+        """
+        semaphore = asyncio.Semaphore(self.config.get("llm_concurrency", 5))
+
+        async def bounded(text):
+            async with semaphore:
+                return await self.aprocess(text)
+
+        return list(await asyncio.gather(*(bounded(text) for text in input_texts)))
+
+    def _build_prompt(self, input_text: str) -> str:
+        return f"""
+        Adapt the following text into a comic book script:
+        
+        {input_text}
+        """
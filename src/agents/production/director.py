@@ -1,70 +1,136 @@
-from typing import Any, Dict, List
+import asyncio
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
 from src.core.agent import BaseAgent
-from src.core.models import Panel, ComicScript
-from src.utils.llm_interface import LLMInterface
+from src.core.models import Scene, Panel, ComicScript
+from src.utils.llm_interface import get_llm
+
+# Static system prompt, built once at import rather than on every call
+_DIRECTOR_SYSTEM_PROMPT = """
+        You are a visionary film director and cinematographer.
+        Your job is to enhance a comic script by adding specific camera angles, framing, and lighting instructions to each panel.
+        
+        For each panel, suggest:
+        1. Camera Angle: (e.g., Low angle, High angle, Bird's eye view, Dutch angle).
+        2. Shot Type: (e.g., Close-up, Medium shot, Long shot).
+        3. Lighting: (e.g., Dramatic shadows, Soft natural light, Neon backlight).
+        
+        Return the updated list of panels with enriched descriptions.
+        """
+
+_DIRECTOR_USER_PREFIX = (
+    "Enhance the following scene with cinematic direction.\n"
+    "Return the updated list of panels: one entry per input panel, same ids, same order.\n\n"
+)
+
+class _PanelList(BaseModel):
+    panels: List[Panel]
 
 class DirectorAgent(BaseAgent):
     def __init__(self, agent_name: str = "Director", config: Dict[str, Any] = None):
         super().__init__(agent_name, config)
-        self.llm = LLMInterface(model_name=config.get("model_name", "gpt-4o"))
+        self.llm = get_llm(config.get("model_name", "gpt-4o"))
 
     def process(self, scene: Any) -> Any:
         """
         Enhances a single scene with detailed camera and lighting directions for each panel.
         """
-        from src.core.models import Scene, Panel
-        
         # Ensure we are working with a Scene object
         if not isinstance(scene, Scene):
             self.logger.warning(f"Director received {type(scene)}, expected Scene. Attempting to skip.")
             return scene
 
         self.logger.info(f"Adding directorial guidance to Scene {scene.id}...")
-        
-        system_prompt = """
-        You are a visionary film director and cinematographer.
-        Your job is to enhance a comic script by adding specific camera angles, framing, and lighting instructions to each panel.
-        
-        For each panel, suggest:
-        1. Camera Angle: (e.g., Low angle, High angle, Bird's eye view, Dutch angle).
-        2. Shot Type: (e.g., Close-up, Medium shot, Long shot).
-        3. Lighting: (e.g., Dramatic shadows, Soft natural light, Neon backlight).
-        
-        Return the updated list of panels with enriched descriptions.
-        """
-        
-        scene_context = f"Scene: {scene.location}. Summary: {scene.narrative_summary}"
-        panels_context = "\n".join([f"Panel {p.id}: {p.description}" for p in scene.panels])
-        
-        user_prompt = f"""
-        Enhance the following scene with cinematic direction:
-        {scene_context}
-        
-        Panels:
-        {panels_context}
-        
-        Return the updated list of panels.
-        """
+        user_prompt = self._build_prompt(scene)
         
         try:
-            from pydantic import BaseModel
-            class PanelList(BaseModel):
-                panels: List[Panel]
-
             enhanced_output = self.llm.generate_structured_output(
                 prompt=user_prompt,
-                system_prompt=system_prompt,
-                schema=PanelList
+                system_prompt=_DIRECTOR_SYSTEM_PROMPT,
+                schema=_PanelList
             )
-            
-            # Replace the old panels with the new ones
-            if len(enhanced_output.panels) == len(scene.panels):
-                scene.panels = enhanced_output.panels
-                self.logger.info(f"Successfully enhanced {len(scene.panels)} panels for Scene {scene.id}")
-            else:
-                self.logger.warning(f"Director returned {len(enhanced_output.panels)} panels, expected {len(scene.panels)}. Keeping originals.")
+            self._apply_enhancement(scene, enhanced_output)
         
         except Exception as e:
             self.logger.error(f"Director failed for scene {scene.id}: {e}")
             
         return scene
+
+    async def aprocess(self, scene: Any) -> Any:
+        """
+        Async version of `process`; the LLM call doesn't block the event loop.
+        """
+        if not isinstance(scene, Scene):
+            self.logger.warning(f"Director received {type(scene)}, expected Scene. Attempting to skip.")
+            return scene
+
+        self.logger.info(f"Adding directorial guidance to Scene {scene.id}...")
+        user_prompt = self._build_prompt(scene)
+
+        try:
+            enhanced_output = await self.llm.agenerate_structured_output(
+                prompt=user_prompt,
+                system_prompt=_DIRECTOR_SYSTEM_PROMPT,
+                schema=_PanelList
+            )
+            self._apply_enhancement(scene, enhanced_output)
+
+        except Exception as e:
+            self.logger.error(f"Director failed for scene {scene.id}: {e}")
+
+        return scene
+
+    async def aprocess_all(self, scenes: List[Any], semaphore: Optional[asyncio.Semaphore] = None) -> List[Any]:
+        """
+        Directs several scenes concurrently, so latency is roughly that of the slowest scene
+        rather than the sum. `llm_concurrency` (default 5) bounds the in-flight requests, unless a
+        shared `semaphore` is passed in. A failing scene keeps its original panels without
+        cancelling the others, so the result always holds one scene per input, never an exception.
+        """
+        self.logger.info(f"Starting execution for {self.name}...")
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.config.get("llm_concurrency", 5))
+
+        async def bounded(scene):
+            async with semaphore:
+                return await self.aprocess(scene)
+
+        results = await asyncio.gather(*(bounded(scene) for scene in scenes), return_exceptions=True)
+        directed = []
+        for scene, result in zip(scenes, results):
+            if isinstance(result, BaseException):
+                self.logger.error(f"Director failed for scene {getattr(scene, 'id', '?')}: {result}")
+                directed.append(scene)
+            else:
+                directed.append(result)
+        self.logger.info(f"Execution handling complete for {self.name}.")
+        return directed
+
+    async def aprocess_scripts(self, scripts: List[ComicScript]) -> List[ComicScript]:
+        """
+        Directs every scene of several scripts on one event loop. All scenes share a single
+        `llm_concurrency` budget, so requests from different scripts interleave and the provider
+        can batch them, instead of one script's scenes waiting behind another's.
+        """
+        semaphore = asyncio.Semaphore(self.config.get("llm_concurrency", 5))
+
+        async def direct(script: ComicScript) -> ComicScript:
+            script.scenes = await self.aprocess_all(script.scenes, semaphore=semaphore)
+            return script
+
+        return list(await asyncio.gather(*(direct(script) for script in scripts)))
+
+    def _build_prompt(self, scene: Any) -> str:
+        # Static instructions first, scene data last: the prompt prefix is then identical across
+        # scenes, so provider-side prefix (KV) caching can reuse it
+        scene_context = f"Scene: {scene.location}. Summary: {scene.narrative_summary}"
+        panels_context = "\n".join([f"Panel {p.id}: {p.description}" for p in scene.panels])
+        return f"{_DIRECTOR_USER_PREFIX}{scene_context}\n\nPanels:\n{panels_context}\n"
+
+    def _apply_enhancement(self, scene: Any, enhanced_output: Any) -> None:
+        # Replace the old panels with the new ones
+        if len(enhanced_output.panels) == len(scene.panels):
+            scene.panels = enhanced_output.panels
+            self.logger.info(f"Successfully enhanced {len(scene.panels)} panels for Scene {scene.id}")
+        else:
+            self.logger.warning(f"Director returned {len(enhanced_output.panels)} panels, expected {len(scene.panels)}. Keeping originals.")
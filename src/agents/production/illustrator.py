@@ -9,6 +9,8 @@ class IllustratorAgent(BaseAgent):
         super().__init__(agent_name, config)
         self.image_generator = image_generator
         self.consistency_manager = consistency_manager
+        # Panels per diffusion batch; SDXL on a 16GB T4 is comfortable at 2-4
+        self.batch_size = self.config.get("batch_size", 4)
 
     def process(self, panel: Panel, characters: Any, style_guide: Optional[str] = None) -> Panel:
         """
@@ -42,19 +44,15 @@ class IllustratorAgent(BaseAgent):
         """
         self.logger.info(f"🎨 Batch Illustrating {len(panels)} panels...")
         
-        # 1. Prepare Prompts
-        prompts = []
-        for panel in panels:
-            final_prompt = self.consistency_manager.process(panel, characters, style_guide=style_guide)
+        # 1. Prepare Prompts (each panel joins the visual memory before the next one in the batch)
+        prompts = self.consistency_manager.process_all(panels, characters, style_guide=style_guide)
+        for panel, final_prompt in zip(panels, prompts):
             panel.image_prompt = final_prompt
-            prompts.append(final_prompt)
-            # Add current panel to visual memory for the next one in the batch
-            self.consistency_manager.add_to_memory(panel.description)
             
         # 2. Call Batch Image Generator
         try:
-            image_paths = self.image_generator.generate_batch(
-                prompts=prompts,
+            image_paths = self._generate_in_batches(
+                prompts,
                 negative_prompt=self.config.get("negative_prompt", "blurry, weird text, bad anatomy")
             )
             
@@ -63,9 +61,40 @@ class IllustratorAgent(BaseAgent):
                     panels[i].image_path = path
                     self.logger.info(f"Generated image for Panel {panels[i].id} saved at: {path}")
         except Exception as e:
-            self.logger.error(f"Batch image generation failed: {e}. Falling back to sequential.")
-            # Fallback to sequential, but still let it raise if sequential also fails
-            for panel in panels:
-                self.process(panel, characters, style_guide=style_guide)
+            # No per-panel fallback: OOM is already recovered by halving the batch, and replaying the
+            # batch one panel at a time would redo every encoder/scheduler pass for an error that
+            # would most likely recur anyway
+            self.logger.error(f"Batch image generation failed: {e}")
+            raise # Propagate error to pipeline
                 
         return panels
+
+    def _generate_in_batches(self, prompts: List[str], negative_prompt: str) -> List[str]:
+        """
+        Runs generate_batch over slices of at most `batch_size` prompts.
+        A slice that runs out of GPU memory is halved and retried until it is a single prompt.
+        """
+        image_paths: List[str] = []
+        pending = [prompts[i:i + self.batch_size] for i in range(0, len(prompts), max(1, self.batch_size))]
+        while pending:
+            chunk = pending.pop(0)
+            try:
+                image_paths.extend(self.image_generator.generate_batch(prompts=chunk, negative_prompt=negative_prompt))
+            except Exception as e:
+                # torch.cuda.OutOfMemoryError; matched by message so this module doesn't import torch
+                if len(chunk) == 1 or "out of memory" not in str(e).lower():
+                    raise
+                half = len(chunk) // 2
+                self.logger.warning(f"Out of memory on a batch of {len(chunk)}; retrying as {half} + {len(chunk) - half}.")
+                self._release_gpu_cache()
+                pending[:0] = [chunk[:half], chunk[half:]]
+        return image_paths
+
+    @staticmethod
+    def _release_gpu_cache():
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
@@ -1,12 +1,12 @@
 from typing import Any, Dict, List
 from src.core.agent import BaseAgent
 from src.core.models import Character, CritiqueResult
-from src.utils.llm_interface import LLMInterface
+from src.utils.llm_interface import get_llm
 
 class CharacterCritiqueAgent(BaseAgent):
     def __init__(self, agent_name: str = "CharacterCritique", config: Dict[str, Any] = None):
         super().__init__(agent_name, config)
-        self.llm = LLMInterface(model_name=config.get("model_name", "gpt-4o"))
+        self.llm = get_llm(config.get("model_name", "gpt-4o"))
 
     def process(self, characters: List[Character]) -> CritiqueResult:
         """
@@ -1,12 +1,17 @@
+import itertools
 from typing import List, Dict, Any
+from pydantic import BaseModel
 from src.core.agent import BaseAgent
 from src.core.models import Character, ComicScript
-from src.utils.llm_interface import LLMInterface
+from src.utils.llm_interface import get_llm
+
+class CharacterList(BaseModel):
+    characters: List[Character]
 
 class CharacterDesignAgent(BaseAgent):
     def __init__(self, agent_name: str = "CharacterDesigner", config: Dict[str, Any] = None):
         super().__init__(agent_name, config)
-        self.llm = LLMInterface(model_name=config.get("model_name", "gpt-4o"))
+        self.llm = get_llm(config.get("model_name", "gpt-4o"))
 
     def process(self, script: ComicScript) -> List[Character]:
         """
@@ -35,16 +40,14 @@ class CharacterDesignAgent(BaseAgent):
         """
         
         # Extract character names from the script scenes to guide the LLM
-        character_names = set()
-        for scene in script.scenes:
-            if scene.characters:
-                for char in scene.characters:
-                    character_names.add(char.name)
-            if scene.panels:
-                 for panel in scene.panels:
-                     if panel.characters_present:
-                         for name in panel.characters_present:
-                             character_names.add(name)
+        character_names = {
+            name
+            for scene in script.scenes
+            for name in itertools.chain(
+                (char.name for char in (scene.characters or [])),
+                *((panel.characters_present or []) for panel in (scene.panels or []))
+            )
+        }
 
         user_prompt = f"""
         Analyze the following script and create character profiles for these characters: {', '.join(character_names)}
@@ -56,10 +59,6 @@ class CharacterDesignAgent(BaseAgent):
         Make sure to merge similar characters into one with aliases.
         """
         
-        from pydantic import BaseModel
-        class CharacterList(BaseModel):
-            characters: List[Character]
-        
         try:
             result = self.llm.generate_structured_output(
                 prompt=user_prompt,
@@ -67,35 +66,46 @@ class CharacterDesignAgent(BaseAgent):
                 schema=CharacterList
             )
             
-            # Smart Deduplication & Alias Merging
-            characters_by_name = {}
-            
-            for char in result.characters:
-                # 1. Normalize name
-                canonical = char.name.strip().lower()
-                
-                # 2. Check if this character is already known via an alias
-                existing_char = None
-                for known_char in characters_by_name.values():
-                    # If current char name matches an existing char's alias OR vice versa
-                    if canonical == known_char.name.lower() or \
-                       any(a.lower() == canonical for a in known_char.aliases) or \
-                       any(a.lower() == known_char.name.lower() for a in char.aliases):
-                        existing_char = known_char
-                        break
-                
-                if existing_char:
-                    # Merge logic: Combine aliases and append descriptions
-                    existing_char.aliases = list(set(existing_char.aliases + char.aliases + [char.name]))
-                    if char.description not in existing_char.description:
-                        existing_char.description += f" | {char.description}"
-                    if char.personality not in existing_char.personality:
-                        existing_char.personality += f" ; {char.personality}"
-                    self.logger.info(f"Merged duplicate character profile for '{char.name}' into '{existing_char.name}'.")
-                else:
-                    characters_by_name[canonical] = char
-            
-            return list(characters_by_name.values())
+            return self._merge_duplicates(result.characters)
         except Exception as e:
             self.logger.error(f"Failed to generate character profiles: {e}")
             raise
+
+    def _merge_duplicates(self, characters: List[Character]) -> List[Character]:
+        """
+        Smart Deduplication & Alias Merging. A profile is merged into an earlier one when its name matches
+        that character's name or one of its aliases, or one of its aliases matches that character's name.
+        Lowercased names/aliases are indexed once, so each profile costs O(aliases) instead of a scan.
+        """
+        characters_by_name: Dict[str, Character] = {}
+        known_by_name: Dict[str, Character] = {}     # lowercased canonical name -> character
+        known_by_alias: Dict[str, Character] = {}    # lowercased name or alias -> character
+
+        for char in characters:
+            # 1. Normalize name
+            canonical = char.name.strip().lower()
+            
+            # 2. Check if this character is already known via an alias
+            # (current char name matches an existing char's name/alias OR one of its aliases names an existing char)
+            existing_char = known_by_alias.get(canonical)
+            if existing_char is None:
+                existing_char = next((known_by_name[a.lower()] for a in char.aliases if a.lower() in known_by_name), None)
+            
+            if existing_char:
+                # Merge logic: Combine aliases and append descriptions
+                existing_char.aliases = list(set(existing_char.aliases + char.aliases + [char.name]))
+                for alias in existing_char.aliases:
+                    known_by_alias.setdefault(alias.lower(), existing_char)
+                if char.description not in existing_char.description:
+                    existing_char.description += f" | {char.description}"
+                if char.personality not in existing_char.personality:
+                    existing_char.personality += f" ; {char.personality}"
+                self.logger.info(f"Merged duplicate character profile for '{char.name}' into '{existing_char.name}'.")
+            else:
+                characters_by_name[canonical] = char
+                known_by_name.setdefault(char.name.lower(), char)
+                known_by_alias.setdefault(char.name.lower(), char)
+                for alias in char.aliases:
+                    known_by_alias.setdefault(alias.lower(), char)
+        
+        return list(characters_by_name.values())
@@ -1,7 +1,20 @@
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
 from src.core.agent import BaseAgent
 from src.core.models import Character, Panel
 
+class CharPart(NamedTuple):
+    """A character's prompt fragments, rendered once per lineup for every compression pass."""
+    name: str
+    core: str     # "Name: description" (truncated by the last pass)
+    full: str     # "(Name: description, personality expression)"
+    compact: str  # "(Name: description)"
+
+    @classmethod
+    def from_character(cls, character: Character) -> "CharPart":
+        core = f"{character.name}: {character.description}"
+        return cls(character.name, core, f"({core}, {character.personality} expression)", f"({core})")
+
 class ConsistencyManager(BaseAgent):
     def __init__(self, agent_name: str = "ConsistencyManager", config: Dict[str, Any] = None):
         super().__init__(agent_name, config)
@@ -9,14 +22,30 @@ class ConsistencyManager(BaseAgent):
         self.negative_prompt = self.config.get("negative_prompt", "blurry, low quality, distortion, bad anatomy")
         self.panel_memory: List[str] = [] # Stores descriptions of previous panels for continuity
         self.memory_limit = 3 # Only keep the last 3 panels for context to avoid prompt bloat
+        # Finished prompts keyed on every input that shapes them (see `_prompt_key`)
+        self._prompt_cache: "OrderedDict[Tuple, str]" = OrderedDict()
+        self.prompt_cache_size = self.config.get("prompt_cache_size", 512)
+        # (characters key, lowercased name/alias -> CharPart) for the last lineup seen
+        self._char_lookup: Optional[Tuple[Tuple, Dict[str, CharPart]]] = None
 
     def process(self, panel: Panel, characters: List[Character], style_guide: Optional[str] = None) -> str:
         """
         Constructs the final image generation prompt for a panel, enforcing character consistency and narrative flow.
         """
+        return self._build_prompt(panel, characters, style_guide, self._characters_key(characters))
+
+    def _build_prompt(self, panel: Panel, characters: List[Character], style_guide: Optional[str], chars_key: Tuple) -> str:
+        """`process` with the lineup key already computed, so runs of panels can share it."""
         self.logger.info(f"Generating consistent prompt for Panel {panel.id}...")
         
         style = style_guide or self.style_preset
+        cache_key = self._prompt_key(panel, chars_key, style)
+        cached = self._prompt_cache.get(cache_key)
+        if cached is not None:
+            self._prompt_cache.move_to_end(cache_key)
+            self.logger.info(f"Final Image Prompt (cached): {cached}")
+            return cached
+
         base_parts = [style]
         
         # Inject Visual Memory context if available
@@ -35,25 +64,72 @@ class ConsistencyManager(BaseAgent):
         # Character parts are handled separately for compression
         char_parts = []
         if panel.characters_present:
+            lookup = self._character_lookup(characters, chars_key)
+            # A character listed under both its name and an alias is only described once
+            seen = set()
             for char_name in panel.characters_present:
-                character = None
-                for c in characters:
-                    if c.name.lower() == char_name.lower() or any(alias.lower() == char_name.lower() for alias in c.aliases):
-                        character = c
-                        break
-                
-                if character:
-                    char_parts.append({
-                        "name": character.name,
-                        "desc": character.description,
-                        "personality": character.personality
-                    })
-
-        final_prompt = self._assemble_and_compress(base_parts, char_parts)
+                part = lookup.get(char_name.lower())
+                if part and id(part) not in seen:
+                    seen.add(id(part))
+                    char_parts.append(part)
+
+        final_prompt = self._assemble_and_compress(", ".join(base_parts), char_parts)
         self.logger.info(f"Final Image Prompt: {final_prompt}")
+
+        self._prompt_cache[cache_key] = final_prompt
+        if len(self._prompt_cache) > self.prompt_cache_size:
+            self._prompt_cache.popitem(last=False)
         
         return final_prompt
 
+    def process_all(self, panels: List[Panel], characters: List[Character], style_guide: Optional[str] = None) -> List[str]:
+        """
+        Builds prompts for a run of consecutive panels, adding each panel to the visual memory before
+        the next one (as the sequential flow does). The lineup key and character lookup are built once
+        for the whole run rather than per panel.
+        """
+        chars_key = self._characters_key(characters)
+        prompts = []
+        for panel in panels:
+            prompts.append(self._build_prompt(panel, characters, style_guide, chars_key))
+            self.add_to_memory(panel.description)
+        return prompts
+
+    @staticmethod
+    def _characters_key(characters: List[Character]) -> Tuple:
+        """Hashable snapshot of the character lineup (Character models themselves aren't hashable)."""
+        return tuple((c.name, c.description, c.personality, tuple(c.aliases)) for c in characters or ())
+
+    def _character_lookup(self, characters: List[Character], chars_key: Tuple) -> Dict[str, CharPart]:
+        """
+        Lowercased name/alias -> the character's rendered CharPart, rebuilt only when the lineup changes.
+        The first character claiming a name wins, matching the order of a linear scan.
+        """
+        if self._char_lookup is not None and self._char_lookup[0] == chars_key:
+            return self._char_lookup[1]
+        lookup: Dict[str, CharPart] = {}
+        for c in characters:
+            part = CharPart.from_character(c)
+            lookup.setdefault(c.name.lower(), part)
+            for alias in c.aliases:
+                lookup.setdefault(alias.lower(), part)
+        self._char_lookup = (chars_key, lookup)
+        return lookup
+
+    def _prompt_key(self, panel: Panel, chars_key: Tuple, style: str) -> Tuple:
+        """
+        Hashable key over everything the prompt depends on, including the visual memory window,
+        since Panel/Character models themselves aren't hashable.
+        """
+        return (
+            panel.id, panel.description, panel.camera_angle, panel.lighting,
+            tuple(panel.characters_present), chars_key, style, tuple(self.panel_memory)
+        )
+
+    def clear_cache(self):
+        """Drops cached prompts (call between scripts)."""
+        self._prompt_cache.clear()
+
     def add_to_memory(self, panel_description: str):
         """
         Updates the storyboard memory with a new panel description.
@@ -63,45 +139,52 @@ class ConsistencyManager(BaseAgent):
             self.panel_memory.pop(0) # Keep sliding window
         self.logger.info(f"Updated Visual Memory. Current history depth: {len(self.panel_memory)}")
 
-    def _assemble_and_compress(self, base_parts: List[str], char_parts: List[Dict[str, str]], max_tokens: int = 225) -> str:
+    def _assemble_and_compress(self, base: str, char_parts: List[CharPart], max_tokens: int = 225) -> str:
         """
-        Assembles prompt parts and compresses character descriptions if they exceed the token limit.
-        Uses a heuristic of 4 characters per token.
+        Assembles the joined base prompt with the character parts and compresses character descriptions
+        if they exceed the token limit. Uses a heuristic of 4 characters per token.
+        Candidate lengths are worked out from the part lengths; only the returned prompt is joined.
         """
         char_limit = max_tokens * 4
-        
-        # 1. First Pass: Full descriptions
-        full_char_strings = [f"({c['name']}: {c['desc']}, {c['personality']} expression)" for c in char_parts]
-        combined = ", ".join(base_parts + full_char_strings)
-        
-        if len(combined) <= char_limit:
-            return combined
+        base_len = len(base)
+        if not char_parts:
+            return base[:char_limit]
+        # Each character part costs its own length plus the ", " separator before it
+        sep_len = 2 * len(char_parts)
+
+        # 1. First Pass: Full descriptions, abandoned as soon as the running length overflows
+        full_chars = []
+        running_len = base_len + sep_len
+        for c in char_parts:
+            running_len += len(c.full)
+            if running_len > char_limit:
+                break
+            full_chars.append(c.full)
+        else:
+            return ", ".join([base] + full_chars)
 
         # 2. Second Pass: Drop personalities
         self.logger.warning(f"Prompt exceeds ~{max_tokens} tokens. Dropping personality traits...")
-        compressed_chars = [f"({c['name']}: {c['desc']})" for c in char_parts]
-        combined = ", ".join(base_parts + compressed_chars)
-        
-        if len(combined) <= char_limit:
-            return combined
+        compressed_chars = [c.compact for c in char_parts]
+        if base_len + sep_len + sum(map(len, compressed_chars)) <= char_limit:
+            return ", ".join([base] + compressed_chars)
 
         # 3. Third Pass: Aggressively truncate individual character descriptions
         # We calculate remaining space for characters
-        base_str = ", ".join(base_parts)
-        remaining_chars = char_limit - len(base_str) - (len(char_parts) * 5) # 5 for ", ()" overhead
+        remaining_chars = char_limit - base_len - (len(char_parts) * 5) # 5 for ", ()" overhead
         
         if remaining_chars > 0:
             per_char_limit = remaining_chars // len(char_parts)
             truncated_chars = []
             for c in char_parts:
-                char_prompt = f"{c['name']}: {c['desc']}"
+                char_prompt = c.core
                 if len(char_prompt) > per_char_limit:
                     char_prompt = char_prompt[:per_char_limit-3] + "..."
                 truncated_chars.append(f"({char_prompt})")
-            combined = base_str + ", " + ", ".join(truncated_chars)
+            combined = base + ", " + ", ".join(truncated_chars)
         else:
             # If base prompt is already too long, we just keep the names
-            combined = base_str + ", " + ", ".join([f"({c['name']})" for c in char_parts])
+            combined = base + ", " + ", ".join([f"({c.name})" for c in char_parts])
 
         # 4. Final hard cut safety
         if len(combined) > char_limit:
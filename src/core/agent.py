@@ -7,6 +7,10 @@ import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Bounds of the backoff used while waiting for a human approval (seconds)
+APPROVAL_POLL_MIN_S = 0.5
+APPROVAL_POLL_MAX_S = 2.0
+
 class BaseAgent(ABC):
     """
     Abstract base class for all agents in the comic generation pipeline.
@@ -20,7 +24,10 @@ class BaseAgent(ABC):
         """
         Polls the checkpoint for a 'user_approved' flag for this specific step.
         Supports uninterrupted auto-run mode and dynamic play/pause controls.
+        While paused, only the checkpoint file's mtime/size are polled; the checkpoint is
+        re-read only after something (the UI server) has rewritten it.
         """
+        import os
         import time
         from src.utils.checkpoint_manager import CheckpointManager
         from src.core.storage import LocalStorage
@@ -45,20 +52,40 @@ class BaseAgent(ABC):
             
         self.logger.info(f"⏸️ Agent {self.name} is waiting for user approval on step: {step_label}...")
         
+        path = mgr.get_checkpoint_path(checkpoint_id)
+        last_signature = None
+        loaded = False
+        delay = APPROVAL_POLL_MIN_S
         while True:
-            state = mgr.load_checkpoint(checkpoint_id)
-            if not state:
-                time.sleep(2)
-                continue
+            try:
+                st = os.stat(path)
+                signature = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                signature = None # Missing locally; load_checkpoint may still pull it from the cloud
+
+            changed = signature != last_signature
+            last_signature = signature
+            # A failed read (e.g. caught mid-write) is retried on the next tick
+            if signature is None or changed or not loaded:
+                state = mgr.load_checkpoint(checkpoint_id)
+                loaded = state is not None
                 
-            # Check if user enabled auto-run or explicitly approved this step
-            if state.metadata.get("auto_run", False) or state.metadata.get(f"approved_{step_label}", False):
-                state.metadata[f"approved_{step_label}"] = True
-                mgr.save_checkpoint(state)
-                self.logger.info(f"✅ User approved/resumed step: {step_label}. Resuming {self.name}...")
-                break
+                # Check if user enabled auto-run or explicitly approved this step
+                if state and (state.metadata.get("auto_run", False) or state.metadata.get(f"approved_{step_label}", False)):
+                    state.metadata[f"approved_{step_label}"] = True
+                    mgr.save_checkpoint(state)
+                    self.logger.info(f"✅ User approved/resumed step: {step_label}. Resuming {self.name}...")
+                    break
+                if signature is None:
+                    # Nothing local to watch, so each tick is a full (possibly remote) load; poll slowly
+                    delay = max(delay, APPROVAL_POLL_MAX_S)
+                elif changed:
+                    # A genuine edit: the user is active, so look again soon
+                    delay = APPROVAL_POLL_MIN_S
                 
-            time.sleep(2) # Poll every 2 seconds
+            time.sleep(delay)
+            # Back off while nothing changes, so long review sessions don't keep waking the CPU
+            delay = min(delay * 2, APPROVAL_POLL_MAX_S)
 
     def process(self, input_data: Any) -> Any:
         # To be implemented by subclasses
@@ -78,7 +105,7 @@ class BaseAgent(ABC):
         """
         if isinstance(expected_schema, type) and issubclass(expected_schema, BaseModel):
             if isinstance(data, dict):
-                return expected_schema.parse_obj(data)
+                return expected_schema.model_validate(data)
             elif isinstance(data, expected_schema):
                 return data
             else:
@@ -16,6 +16,15 @@ class PipelineState(BaseModel):
     scene_plans: Dict[int, Any] = Field(default_factory=dict, description="Dictionary of scene plans (id -> plan object)")
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Additional metadata (timestamps, model names, etc.)")
     
+    def to_bytes(self) -> bytes:
+        """Compact JSON bytes, serialized in one pass by pydantic-core."""
+        return self.model_dump_json().encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "PipelineState":
+        """Parses and validates JSON bytes in one pass, without building an intermediate dict."""
+        return cls.model_validate_json(raw)
+
     @property
     def stage(self) -> str:
         """Helper to determine the current stage of the pipeline."""
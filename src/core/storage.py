@@ -1,6 +1,7 @@
 import os
 import shutil
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from abc import ABC, abstractmethod
 from typing import Optional, Any, List
 import logging
@@ -13,6 +14,11 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Already entropy-coded formats: deflating them again costs CPU for no size gain
+PRECOMPRESSED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".gif", ".mp4", ".zip"}
+# Upper bound on concurrent page copies in save_comic
+MAX_COPY_WORKERS = 8
+
 class StorageInterface(ABC):
     @abstractmethod
     def save_file(self, local_path: str, remote_path: str) -> str:
@@ -58,26 +64,39 @@ class LocalStorage(StorageInterface):
         output_paths.append(script_path)
         
         # Save pages
+        copies = []
         for i, page_path in enumerate(finished_pages):
             if page_path and os.path.exists(page_path):
                 ext = os.path.splitext(page_path)[1]
-                target_path = os.path.join(output_dir, f"page_{i+1}{ext}")
+                copies.append((page_path, os.path.join(output_dir, f"page_{i+1}{ext}")))
+
+        # Copies are IO-bound, so overlap them across a few threads (the kernel-side
+        # sendfile fast path inside shutil still applies per copy)
+        if len(copies) > 1:
+            with ThreadPoolExecutor(max_workers=min(MAX_COPY_WORKERS, len(copies))) as executor:
+                list(executor.map(lambda job: shutil.copy2(*job), copies))
+        else:
+            for page_path, target_path in copies:
                 shutil.copy2(page_path, target_path)
-                output_paths.append(target_path)
+        output_paths.extend(target_path for _, target_path in copies)
                 
         return output_paths
             
     def zip_output(self, source_dir: str, zip_name: str = "comic_output.zip") -> str:
         """
         Zips the output directory for easy download.
+        Images are stored as-is; only text/metadata files are deflated (at a fast level).
         """
         zip_path = os.path.join(os.path.dirname(source_dir), zip_name)
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zipf:
             for root, dirs, files in os.walk(source_dir):
                 for file in files:
                     file_path = os.path.join(root, file)
                     arcname = os.path.relpath(file_path, source_dir)
-                    zipf.write(file_path, arcname)
+                    if os.path.splitext(file)[1].lower() in PRECOMPRESSED_EXTENSIONS:
+                        zipf.write(file_path, arcname, compress_type=zipfile.ZIP_STORED)
+                    else:
+                        zipf.write(file_path, arcname)
         return zip_path
 
 class HuggingFaceStorage(StorageInterface):
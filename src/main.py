@@ -3,9 +3,10 @@ import sys
 
 # Set PyTorch memory allocation strategy to prevent fragmentation.
 # This MUST be set before torch is imported or any CUDA calls are made.
-os.environ["PYTORCH_CUDA_ALLOC_CONF"] = "expandable_segments:True"
+os.environ["PYTORCH_CUDA_ALLOC_CONF"] = "expandable_segments:True,garbage_collection_threshold:0.8"
 
 import argparse
+import asyncio
 import logging
 from concurrent.futures import ThreadPoolExecutor
 
@@ -26,7 +27,7 @@ from src.agents.production.director import DirectorAgent
 from src.agents.production.illustrator import IllustratorAgent
 from src.agents.production.image_generators import MockImageGenerator, DiffusersImageGenerator
 from src.agents.assembly.layout_engine import LayoutEngine
-from src.agents.assembly.lettering import LetteringAgent
+from src.agents.assembly.lettering import LetteringAgent, lettered_path
 from src.core.storage import HuggingFaceStorage, LocalStorage
 from src.core.checkpoint import PipelineState
 from src.utils.checkpoint_manager import CheckpointManager
@@ -44,6 +45,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger("ComicGen")
 
+def _scene_finished(state: PipelineState, scene_id: int, output_format: str) -> bool:
+    """
+    True if a scene was fully drawn and lettered by an earlier run: it is at or before the
+    checkpoint's last_scene_id and every panel of its drawn plan has a lettered file on disk.
+    """
+    if scene_id > state.last_scene_id:
+        return False
+    # Image paths are only recorded on the drawn scene plans, not on the script panels
+    plan_data = state.scene_plans.get(scene_id) or state.scene_plans.get(str(scene_id)) or {}
+    plan_panels = plan_data.get("panels") or []
+    return bool(plan_panels) and all(
+        panel.get("image_path") and os.path.exists(lettered_path(panel["image_path"], output_format))
+        for panel in plan_panels
+    )
+
 def main():
     parser = argparse.ArgumentParser(description="AI Comic Book Generator")
     parser.add_argument("--input", type=str, required=True, help="Path to input text/pdf/docx file")
@@ -109,8 +125,8 @@ def main():
         # Step 0: Pre-flight Health Checks
         if args.phase in ["all", "plan"]:
             logger.info("🛡️ Running pre-flight health checks...")
-            from src.utils.llm_interface import LLMInterface
-            reasoning_llm = LLMInterface(model_name=args.reasoning_model)
+            from src.utils.llm_interface import get_llm
+            reasoning_llm = get_llm(args.reasoning_model)
             
             if not reasoning_llm.is_healthy():
                 logger.error("❌ LOCAL LLM SERVICE (Ollama) IS UNREACHABLE!")
@@ -123,8 +139,8 @@ def main():
             logger.info("✅ Core LLM backend is healthy.")
         else:
             logger.info("⏭️ Skipping LLM health checks (Independent Drawing Mode).")
-            from src.utils.llm_interface import LLMInterface
-            reasoning_llm = LLMInterface(model_name=args.reasoning_model)
+            from src.utils.llm_interface import get_llm
+            reasoning_llm = get_llm(args.reasoning_model)
 
         # Step 1: Input Analysis
         raw_text = input_reader.process(args.input)
@@ -248,19 +264,10 @@ def main():
         # We pre-calculate all scene plans BEFORE starting image generation to avoid VRAM competition.
         if args.phase in ["all", "plan"]:
             logger.info("📐 Starting Visual Planning Phase...")
+            scenes_to_plan = []
             for scene in script.scenes:
                 # Check if we should skip planning if scene images already exist
-                scene_done = scene.id <= state.last_scene_id
-                files_exist = True
-                if scene_done:
-                    for panel in scene.panels:
-                        import hashlib
-                        h = hashlib.md5(panel.image_prompt.encode() if panel.image_prompt else "".encode()).hexdigest()[:8]
-                        if not os.path.exists(os.path.join("output", f"gen_{h}_lettered.png")):
-                            files_exist = False
-                            break
-                
-                if scene_done and files_exist:
+                if _scene_finished(state, scene.id, lettering_agent.output_format):
                     continue
 
                 if str(scene.id) in state.scene_plans or scene.id in state.scene_plans:
@@ -268,7 +275,13 @@ def main():
                      continue
 
                 logger.info(f"📋 Planning Scene {scene.id}: {scene.location}...")
-                state.scene_plans[scene.id] = director.run(scene).dict() # Store as dict for serialization
+                scenes_to_plan.append(scene)
+
+            # Scene plans are independent LLM calls, so dispatch them concurrently
+            # (bounded by the Director's llm_concurrency)
+            if scenes_to_plan:
+                for planned_scene in asyncio.run(director.aprocess_all(scenes_to_plan)):
+                    state.scene_plans[planned_scene.id] = planned_scene.model_dump() # Store as dict for serialization
                 
                 # Progress Update: Planning - Visual (50-100%)
                 scenes_processed = len(state.scene_plans)
@@ -297,8 +310,8 @@ def main():
             reasoning_llm.unload_model()
             
             # 2. Unload Fast/Utility models (for Character Critique/Lettering setup)
-            from src.utils.llm_interface import LLMInterface
-            fast_llm = LLMInterface(model_name=args.fast_model)
+            from src.utils.llm_interface import get_llm
+            fast_llm = get_llm(args.fast_model)
             fast_llm.unload_model()
             
             # 3. Deep Garbage Collection
@@ -328,6 +341,11 @@ def main():
 
             finished_pages = []
             for scene in script.scenes:
+                # A resumed run must not redraw, re-letter or re-append pages of scenes already finished
+                if _scene_finished(state, scene.id, lettering_agent.output_format):
+                    logger.info(f"⏭️ Skipping Scene {scene.id} (already drawn and lettered).")
+                    continue
+
                 # Retrieve plan from state
                 scene_plan_data = state.scene_plans.get(scene.id) or state.scene_plans.get(str(scene.id))
                 
@@ -335,7 +353,7 @@ def main():
                     # Robust Resume: If plan is missing but we're in draw mode, we might need to re-plan or error
                     if args.phase == "draw":
                         logger.warning(f"⚠️ Plan missing for Scene {scene.id}. Re-planning in Draw mode...")
-                        scene_plan_data = director.run(scene).dict()
+                        scene_plan_data = director.run(scene).model_dump()
                     else:
                          continue
 
@@ -346,35 +364,34 @@ def main():
                 
                 # Illustrator generates images (Batch Optimized)
                 illustrator.run_batch(scene_plan.panels, characters=characters, style_guide=script.style_guide)
+                # Keep the drawn plan (with its image paths) so a resumed run can tell the scene is done
+                state.scene_plans.pop(str(scene.id), None)
+                state.scene_plans[scene.id] = scene_plan.model_dump()
             
-            # Step 8: Layout & Lettering (Per Scene for now, or Per Page)
-            logger.info(f"📐 Assembling Scene {scene.id}...")
-            scene_panels = layout_engine.run(scene_plan.panels)
-            
-            # Lettering adds text to the images
-            lettering_tasks = []
-            with ThreadPoolExecutor(max_workers=min(4, len(scene_panels))) as executor:
-                for panel in scene_panels:
-                    task = executor.submit(lettering_agent.run, panel)
-                    lettering_tasks.append(task)
-            
-            for task in lettering_tasks:
-                final_image_path = task.result()
-                if final_image_path:
-                    state.finished_pages.append(final_image_path)
-            
-            # Save Checkpoint after each scene
-            state.last_scene_id = scene.id
-            checkpoint_mgr.save_checkpoint(state)
-            
-            # Progress Update: Drawing (0-100% of Draw phase, but logged for visibility)
-            scenes_drawn = len([s for s in script.scenes if s.id <= state.last_scene_id])
-            progress = int((scenes_drawn / len(script.scenes)) * 100)
-            logger.info(f"[PROGRESS] {progress}% - Drawing scene {scenes_drawn}/{len(script.scenes)} complete.")
+                # Step 8: Layout & Lettering (Per Scene for now, or Per Page)
+                logger.info(f"📐 Assembling Scene {scene.id}...")
+                scene_panels = layout_engine.run(scene_plan.panels)
+                
+                # Lettering adds text to the images (whole scene per call, lettered in parallel)
+                for final_image_path in lettering_agent.run(scene_panels):
+                    # A partially finished scene is redrawn onto the same lettered paths
+                    if final_image_path and final_image_path not in state.finished_pages:
+                        state.finished_pages.append(final_image_path)
+                
+                # Save Checkpoint after each scene
+                state.last_scene_id = scene.id
+                checkpoint_mgr.save_checkpoint(state)
+                
+                # Progress Update: Drawing (0-100% of Draw phase, but logged for visibility)
+                scenes_drawn = len([s for s in script.scenes if s.id <= state.last_scene_id])
+                progress = int((scenes_drawn / len(script.scenes)) * 100)
+                logger.info(f"[PROGRESS] {progress}% - Drawing scene {scenes_drawn}/{len(script.scenes)} complete.")
         
         # Step 7: Final Comic Packaging
         logger.info("📦 Packaging final comic...")
         output_paths = storage.save_comic(script, state.finished_pages, args.output)
+        # Every scene is lettered by now
+        lettering_agent.shutdown()
         logger.info(f"🚀 Comic Generation Complete! Output saved to {args.output}")
         for p in output_paths:
             logger.info(f"  - {p}")
@@ -403,6 +420,5 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    if not os.path.exists("output"):
-        os.makedirs("output")
+    os.makedirs("output", exist_ok=True)
     main()
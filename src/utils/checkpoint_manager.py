@@ -9,6 +9,11 @@ from pydantic import ValidationError
 from src.core.checkpoint import PipelineState
 from src.core.storage import StorageInterface, LocalStorage, HuggingFaceStorage
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger("CheckpointManager")
 
 class CheckpointManager:
@@ -43,9 +48,9 @@ class CheckpointManager:
         """Saves the state locally and attempts to sync to cloud."""
         path = self.get_checkpoint_path(state.input_hash)
         
-        # 1. Save Locally
-        with open(path, 'w') as f:
-            f.write(state.model_dump_json(indent=2))
+        # 1. Save Locally (compact JSON bytes straight from pydantic-core, no intermediate dict)
+        with open(path, 'wb') as f:
+            f.write(state.to_bytes())
         
         logger.info(f"💾 Checkpoint saved locally to {path}")
 
@@ -79,15 +84,15 @@ class CheckpointManager:
     def _background_git_push(self, path: str, input_hash: str):
         """Internal method for background Git sync."""
         try:
-            from src.agents.infrastructure.git_automation import GitAutomationAgent
+            from src.agents.infrastructure.git_automation import GitAutomationAgent, GIT_PUSH
             git = GitAutomationAgent("CheckpointGit")
             
             # Ensure git identity is set (crucial for Colab/CI)
             self._ensure_git_config(git)
             
-            git.run_command(f"git add {path}")
-            git.run_command(f'git commit -m "docs: save checkpoint for {input_hash[:12]}"')
-            git.run_command("git push")
+            git.run_command(["git", "add", path])
+            git.run_command(["git", "commit", "-m", f"docs: save checkpoint for {input_hash[:12]}"])
+            git.run_command(GIT_PUSH)
             logger.info("☁️ Background git sync complete.")
         except Exception as e:
             logger.debug(f"Git background sync skipped or failed: {e}")
@@ -96,11 +101,11 @@ class CheckpointManager:
         """Sets a dummy git identity if none exists."""
         try:
             # Check if user.email is set
-            check = git_agent.run_command("git config user.email")
+            check = git_agent.run_command(["git", "config", "user.email"])
             if not check or "root@" in check or "(none)" in check:
                 logger.info("🔧 Setting dummy Git identity for checkpoint sync...")
-                git_agent.run_command('git config --global user.email "comic-gen-bot@example.com"')
-                git_agent.run_command('git config --global user.name "ComicGen Bot"')
+                git_agent.run_command(["git", "config", "--global", "user.email", "comic-gen-bot@example.com"])
+                git_agent.run_command(["git", "config", "--global", "user.name", "ComicGen Bot"])
         except Exception:
             # Fallback for systems where git config fails
             pass
@@ -160,23 +165,35 @@ class CheckpointManager:
             return None
 
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(path, 'rb') as f:
+                raw = f.read()
             
-            # Safe Unmarshalling: Try strict first, then fallback to dict-level repair
-            state = PipelineState.model_validate(data)
+            # Safe Unmarshalling: Try strict first (parsed and validated in one pass), then fallback to dict-level repair
+            state = PipelineState.from_bytes(raw)
             logger.info(f"🔄 Checkpoint loaded successfully from {path}")
             return state
             
         except ValidationError as ve:
             logger.warning(f"⚠️ Checkpoint schema mismatch: {ve}. Attempting partial recovery...")
             # Fallback: try to return the raw data if we can't validate (for development)
-            try: return PipelineState.model_construct(**data)
+            try: return PipelineState.model_construct(**self._loads(raw))
             except: return None
         except Exception as e:
             logger.error(f"❌ Failed to load checkpoint: {e}")
             return None
 
+    def _read_json(self, path: str) -> Any:
+        """Reads a JSON checkpoint file, using orjson when available."""
+        with open(path, 'rb') as f:
+            return self._loads(f.read())
+
+    @staticmethod
+    def _loads(raw: bytes) -> Any:
+        """Decodes JSON bytes, using orjson when available."""
+        if orjson is not None:
+            return orjson.loads(raw)
+        return json.loads(raw)
+
     def clear_checkpoint(self, input_hash: str):
         """Deletes the checkpoint file."""
         path = self.get_checkpoint_path(input_hash)
@@ -195,18 +212,17 @@ class CheckpointManager:
                 # Extract hash if possible, or just load and check
                 path = os.path.join(self.checkpoint_dir, filename)
                 try:
-                    with open(path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        # We only need a summary for the list view
-                        checkpoints.append({
-                            "input_hash": data.get("input_hash"),
-                            "stage": data.get("stage", "unknown"),
-                            "last_chunk_index": data.get("last_chunk_index", -1),
-                            "scenes_total": len(data.get("master_script", {}).get("scenes", [])) if data.get("master_script") else 0,
-                            "pages_generated": len(data.get("finished_pages", [])),
-                            "timestamp": os.path.getmtime(path),
-                            "name": data.get("metadata", {}).get("project_name", f"Project {data.get('input_hash', '')[:8]}")
-                        })
+                    data = self._read_json(path)
+                    # We only need a summary for the list view
+                    checkpoints.append({
+                        "input_hash": data.get("input_hash"),
+                        "stage": data.get("stage", "unknown"),
+                        "last_chunk_index": data.get("last_chunk_index", -1),
+                        "scenes_total": len(data.get("master_script", {}).get("scenes", [])) if data.get("master_script") else 0,
+                        "pages_generated": len(data.get("finished_pages", [])),
+                        "timestamp": os.path.getmtime(path),
+                        "name": data.get("metadata", {}).get("project_name", f"Project {data.get('input_hash', '')[:8]}")
+                    })
                 except Exception as e:
                     logger.warning(f"Failed to parse checkpoint {filename}: {e}")
         
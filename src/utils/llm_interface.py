@@ -1,9 +1,11 @@
 import os
+import asyncio
+import functools
 import threading
 from typing import Type, TypeVar, Optional, Any, Dict
 from pydantic import BaseModel
 import litellm
-from litellm import completion
+from litellm import completion, acompletion
 import json
 import logging
 
@@ -11,6 +13,16 @@ logger = logging.getLogger(__name__)
 
 T = TypeVar("T", bound=BaseModel)
 
+@functools.lru_cache(maxsize=64)
+def _schema_json(schema: Type[BaseModel]) -> str:
+    """JSON schema text for a model, rendered once per schema class instead of on every request."""
+    return json.dumps(schema.model_json_schema(), indent=2)
+
+@functools.lru_cache(maxsize=64)
+def _schema_skeleton(schema: Type[BaseModel]) -> str:
+    """Deep JSON skeleton for a model (used to steer local models), built once per schema class."""
+    return LLMInterface._resilience_agent.generate_deep_skeleton(schema)
+
 class LLMInterface:
     _resilience_agent = None  # Class-level cache for efficiency
     _ollama_semaphore = threading.Semaphore(1) # Serialize local LLM calls to prevent timeouts
@@ -89,6 +101,69 @@ class LLMInterface:
             return False
         return True # Assume cloud models are healthy if API keys are present
 
+    def _structured_request(self, prompt: str, schema: Type[T], system_prompt: str, schema_skeleton: str,
+                            is_local: bool, attempt: int) -> Dict[str, Any]:
+        """
+        Builds the completion kwargs for one structured-output attempt.
+        """
+        if is_local:
+            if attempt == 0:
+                enhanced_system = (
+                    f"{system_prompt}\n\n"
+                    f"IMPORTANT: Respond ONLY with valid JSON.\n"
+                    f"CRITICAL: Follow this exact structure:\n"
+                    f"{schema_skeleton}\n"
+                )
+            else:
+                enhanced_system = (
+                    f"Previous response failed validation. Hallucinated fields detected.\n"
+                    f"YOU MUST MATCH THIS EXACT STRUCTURE:\n"
+                    f"{schema_skeleton}\n"
+                    f"Respond ONLY with the JSON object."
+                )
+        else:
+            enhanced_system = f"{system_prompt}\n\nSchema: {_schema_json(schema)}"
+
+        # LiteLLM/Ollama Optimizations
+        completion_kwargs = {
+            "model": self.model_name,
+            "messages": [
+                {"role": "system", "content": enhanced_system},
+                {"role": "user", "content": prompt}
+            ],
+            "api_key": self.api_key,
+            "timeout": 600
+        }
+
+        if is_local:
+            completion_kwargs["keep_alive"] = "20m"
+        return completion_kwargs
+
+    def _parse_structured_response(self, response: Any, schema: Type[T], is_local: bool) -> T:
+        """
+        Extracts, repairs (local models) and validates the JSON payload of a completion.
+        """
+        content = response.choices[0].message.content
+        if not content or not content.strip():
+            raise ValueError("Empty response")
+
+        json_content = self._extract_json(content)
+
+        if is_local:
+            data = LLMInterface._resilience_agent.repair_json(json_content, schema)
+        else:
+            data = json.loads(json_content)
+
+        return schema.model_validate(data)
+
+    def _retry_sleep_time(self, error: Exception, is_local: bool) -> float:
+        # 💡 Specific logic for connection errors (service might be restarting)
+        is_conn_error = "Connection refused" in str(error) or "APIConnectionError" in str(error)
+        if is_conn_error:
+             logger.info("⏳ Connection refused. Service might be down or restarting. Waiting 5s...")
+        # Longer sleep for connection errors
+        return 1 if is_local and not is_conn_error else 5
+
     def generate_structured_output(self, prompt: str, schema: Type[T], system_prompt: str = "You are a helpful assistant. Respond ONLY with valid JSON.") -> T:
         """
         Generates a response from the LLM with optimized latency and resilience.
@@ -97,8 +172,7 @@ class LLMInterface:
         last_error = None
         
         # Pre-cache schema skeleton
-        resilience = LLMInterface._resilience_agent
-        schema_skeleton = resilience.generate_deep_skeleton(schema)
+        schema_skeleton = _schema_skeleton(schema)
         is_local = "ollama" in self.model_name or "local" in self.model_name
         
         for attempt in range(max_retries):
@@ -106,75 +180,54 @@ class LLMInterface:
             with LLMInterface._ollama_semaphore if is_local else threading.Lock():
                 try:
                     logger.info(f"LLM Request (Attempt {attempt + 1}/{max_retries}) using {self.model_name}...")
-                    
-                    if is_local:
-                        if attempt == 0:
-                            enhanced_system = (
-                                f"{system_prompt}\n\n"
-                                f"IMPORTANT: Respond ONLY with valid JSON.\n"
-                                f"CRITICAL: Follow this exact structure:\n"
-                                f"{schema_skeleton}\n"
-                            )
-                        else:
-                            enhanced_system = (
-                                f"Previous response failed validation. Hallucinated fields detected.\n"
-                                f"YOU MUST MATCH THIS EXACT STRUCTURE:\n"
-                                f"{schema_skeleton}\n"
-                                f"Respond ONLY with the JSON object."
-                            )
-                    else:
-                        enhanced_system = f"{system_prompt}\n\nSchema: {json.dumps(schema.model_json_schema(), indent=2)}"
-
-                    # LiteLLM/Ollama Optimizations
-                    completion_kwargs = {
-                        "model": self.model_name,
-                        "messages": [
-                            {"role": "system", "content": enhanced_system},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "api_key": self.api_key,
-                        "timeout": 600
-                    }
-                    
-                    if is_local:
-                        completion_kwargs["keep_alive"] = "20m"
-                        
+                    completion_kwargs = self._structured_request(prompt, schema, system_prompt, schema_skeleton, is_local, attempt)
                     response = completion(**completion_kwargs)
-                    
-                    content = response.choices[0].message.content
-                    if not content or not content.strip():
-                        raise ValueError("Empty response")
-
-                    json_content = self._extract_json(content)
-                    
-                    if is_local:
-                        data = resilience.repair_json(json_content, schema)
-                    else:
-                        data = json.loads(json_content)
-
-                    return schema.model_validate(data)
+                    return self._parse_structured_response(response, schema, is_local)
 
                 except Exception as e:
                     last_error = e
                     logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
                     
-                    # 💡 Specific logic for connection errors (service might be restarting)
-                    is_conn_error = "Connection refused" in str(e) or "APIConnectionError" in str(e)
-                    
                     if attempt < max_retries - 1:
-                        # Longer sleep for connection errors
-                        sleep_time = 1 if is_local and not is_conn_error else 5
-                        if is_conn_error:
-                             logger.info("⏳ Connection refused. Service might be down or restarting. Waiting 5s...")
-                        
                         import time
-                        time.sleep(sleep_time)
+                        time.sleep(self._retry_sleep_time(e, is_local))
                     continue
         
         # If we get here, all retries failed
         if last_error:
             raise last_error
         raise ValueError(f"LLM request failed after {max_retries} attempts for unknown reasons.")
+
+    async def agenerate_structured_output(self, prompt: str, schema: Type[T], system_prompt: str = "You are a helpful assistant. Respond ONLY with valid JSON.") -> T:
+        """
+        Async sibling of `generate_structured_output` so callers can fan out several requests with asyncio.gather.
+        Local models are serialized anyway, so they run the sync path in a worker thread.
+        """
+        is_local = "ollama" in self.model_name or "local" in self.model_name
+        if is_local:
+            return await asyncio.to_thread(self.generate_structured_output, prompt, schema, system_prompt)
+
+        max_retries = 3
+        last_error = None
+        schema_skeleton = _schema_skeleton(schema)
+
+        for attempt in range(max_retries):
+            try:
+                logger.info(f"LLM Request (Attempt {attempt + 1}/{max_retries}) using {self.model_name}...")
+                completion_kwargs = self._structured_request(prompt, schema, system_prompt, schema_skeleton, is_local, attempt)
+                response = await acompletion(**completion_kwargs)
+                return self._parse_structured_response(response, schema, is_local)
+
+            except Exception as e:
+                last_error = e
+                logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
+
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(self._retry_sleep_time(e, is_local))
+
+        if last_error:
+            raise last_error
+        raise ValueError(f"LLM request failed after {max_retries} attempts for unknown reasons.")
         
     def unload_model(self):
         """
@@ -238,3 +291,15 @@ class LLMInterface:
             api_key=self.api_key
         )
         return response.choices[0].message.content
+
+# One shared interface per model, so agents using the same model share the client and its keep-alive pool
+_LLM_CLIENTS: Dict[str, LLMInterface] = {}
+_LLM_CLIENTS_LOCK = threading.Lock()
+
+def get_llm(model_name: str = "gpt-4o") -> LLMInterface:
+    """Returns the process-wide LLMInterface for `model_name`, creating it on first use."""
+    with _LLM_CLIENTS_LOCK:
+        llm = _LLM_CLIENTS.get(model_name)
+        if llm is None:
+            llm = _LLM_CLIENTS[model_name] = LLMInterface(model_name=model_name)
+        return llm
@@ -0,0 +1,47 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from src.core.agent import BaseAgent, APPROVAL_POLL_MAX_S, APPROVAL_POLL_MIN_S
+
+class _Agent(BaseAgent):
+    def process(self, input_data):
+        return input_data
+
+class TestApprovalBackoff(unittest.TestCase):
+    def _wait(self, loads, signatures):
+        """Runs wait_for_user_approval against scripted loads/stat results and returns the sleeps."""
+        mgr = mock.Mock()
+        mgr.load_checkpoint.side_effect = loads
+        mgr.get_checkpoint_path.return_value = "ckpt.json"
+        sleeps = []
+
+        def fake_stat(path):
+            sig = signatures.pop(0)
+            if sig is None:
+                raise FileNotFoundError(path)
+            return SimpleNamespace(st_mtime_ns=sig, st_size=1)
+
+        with mock.patch("src.utils.checkpoint_manager.CheckpointManager", return_value=mgr), \
+             mock.patch("src.core.storage.LocalStorage"), \
+             mock.patch("os.stat", side_effect=fake_stat), \
+             mock.patch("time.sleep", side_effect=sleeps.append):
+            _Agent("Test").wait_for_user_approval("abc", "script")
+        return sleeps, mgr
+
+    def test_missing_checkpoint_polls_slowly(self):
+        """Verify a checkpoint with no local file is polled at the ceiling, not hammered at the floor."""
+        approved = SimpleNamespace(metadata={"approved_script": True})
+        sleeps, _ = self._wait([None, None, None, None, approved], [None] * 4)
+        self.assertEqual(sleeps, [APPROVAL_POLL_MAX_S] * 3)
+
+    def test_backoff_resets_only_on_change(self):
+        """Verify unchanged checkpoints are not re-read and only a real edit resets the delay."""
+        paused = SimpleNamespace(metadata={})
+        approved = SimpleNamespace(metadata={"approved_script": True})
+        # Initial check, a read caught mid-write, its retry, then one read per change
+        sleeps, mgr = self._wait([None, None, paused, paused, approved], [1, 1, 1, 1, 2, 2, 3])
+        self.assertEqual(mgr.load_checkpoint.call_count, 5)
+        self.assertEqual(sleeps, [APPROVAL_POLL_MIN_S, 1.0, 2.0, 2.0, APPROVAL_POLL_MIN_S, 1.0])
+
+if __name__ == "__main__":
+    unittest.main()
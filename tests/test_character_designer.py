@@ -0,0 +1,35 @@
+import unittest
+from src.agents.visual.character_designer import CharacterDesignAgent
+from src.core.models import Character
+
+class TestMergeDuplicates(unittest.TestCase):
+    def setUp(self):
+        self.agent = CharacterDesignAgent("CharacterDesigner", config={"model_name": "test-model"})
+
+    def test_merges_by_name_and_alias(self):
+        """Verify profiles matching an earlier name or alias (either direction) are folded into it."""
+        characters = [
+            Character(name="Santiago", aliases=["The Boy"], description="Young shepherd", personality="Quiet", pronouns="He/Him"),
+            Character(name="the boy", description="Carries a book", personality="Curious", pronouns="He/Him"),
+            Character(name="Shepherd", aliases=["Santiago"], description="Young shepherd", personality="Quiet", pronouns="He/Him"),
+            Character(name="Fatima", description="Desert woman", personality="Calm", pronouns="She/Her"),
+        ]
+        merged = self.agent._merge_duplicates(characters)
+
+        self.assertEqual([c.name for c in merged], ["Santiago", "Fatima"])
+        santiago = merged[0]
+        self.assertEqual(set(santiago.aliases), {"The Boy", "the boy", "Shepherd", "Santiago"})
+        # Descriptions/personalities are only appended when new
+        self.assertEqual(santiago.description, "Young shepherd | Carries a book")
+        self.assertEqual(santiago.personality, "Quiet ; Curious")
+
+    def test_distinct_characters_untouched(self):
+        """Verify unrelated characters pass through unchanged and in order."""
+        characters = [
+            Character(name="A", description="a", personality="x", pronouns="They/Them"),
+            Character(name="B", description="b", personality="y", pronouns="They/Them"),
+        ]
+        self.assertEqual(self.agent._merge_duplicates(characters), characters)
+
+if __name__ == "__main__":
+    unittest.main()
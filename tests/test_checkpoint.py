@@ -92,5 +92,31 @@ class TestCheckpointSystem(unittest.TestCase):
         state.characters = [Character(name="M", description="D", personality="P", pronouns="They/Them")]
         self.assertEqual(state.stage, "production")
 
+    def test_bytes_round_trip(self):
+        """Verify to_bytes/from_bytes preserve nested models and rebuild them as models, not dicts."""
+        from src.core.models import Character, Panel, Scene
+        state = PipelineState(
+            input_hash=self.input_hash,
+            master_script=ComicScript(title="T", synopsis="S", scenes=[
+                Scene(id=1, location="Desert", narrative_summary="Walk", panels=[Panel(id=1, description="Dunes")])
+            ]),
+            characters=[Character(name="Santiago", aliases=["The Boy"], description="D", personality="P", pronouns="He/Him")],
+            finished_pages=["output/page_1.png"],
+            metadata={"auto_run": False}
+        )
+        restored = PipelineState.from_bytes(state.to_bytes())
+        self.assertEqual(restored, state)
+        self.assertIsInstance(restored.master_script.scenes[0].panels[0], Panel)
+        self.assertEqual(restored.characters[0].aliases, ["The Boy"])
+
+    def test_load_recovers_schema_mismatch(self):
+        """Verify a checkpoint that fails validation still loads through the partial-recovery path."""
+        path = self.manager.get_checkpoint_path(self.input_hash)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"input_hash": "%s", "last_chunk_index": "not a number"}' % self.input_hash)
+        loaded = self.manager.load_checkpoint(self.input_hash)
+        self.assertIsNotNone(loaded)
+        self.assertEqual(loaded.input_hash, self.input_hash)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,58 @@
+import asyncio
+import unittest
+from src.agents.production.director import DirectorAgent
+from src.core.models import ComicScript, Panel, Scene
+
+class TestDirectorFanOut(unittest.TestCase):
+    def test_failed_scene_keeps_original(self):
+        """Verify a scene whose call raises comes back unchanged, in order, instead of as an exception."""
+        director = DirectorAgent("Director", config={"model_name": "test-model"})
+        scenes = [
+            Scene(id=i, location="Desert", narrative_summary="Walk", panels=[Panel(id=1, description="Dunes")])
+            for i in range(3)
+        ]
+
+        async def fake_aprocess(scene):
+            if scene.id == 1:
+                raise RuntimeError("provider down")
+            scene.panels[0].camera_angle = "Wide shot"
+            return scene
+
+        director.aprocess = fake_aprocess
+        directed = asyncio.run(director.aprocess_all(scenes))
+
+        self.assertEqual([s.id for s in directed], [0, 1, 2])
+        self.assertTrue(all(isinstance(s, Scene) for s in directed))
+        self.assertIsNone(directed[1].panels[0].camera_angle)
+        self.assertEqual(directed[2].panels[0].camera_angle, "Wide shot")
+
+    def test_scripts_share_one_budget(self):
+        """Verify scenes of several scripts interleave under a single llm_concurrency limit."""
+        director = DirectorAgent("Director", config={"model_name": "test-model", "llm_concurrency": 3})
+        scripts = [
+            ComicScript(title=f"T{n}", synopsis="S", scenes=[
+                Scene(id=i, location="Desert", narrative_summary="Walk", panels=[Panel(id=1, description="Dunes")])
+                for i in range(4)
+            ])
+            for n in range(2)
+        ]
+        in_flight, peak = 0, 0
+
+        async def fake_aprocess(scene):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            scene.panels[0].lighting = "Noon"
+            return scene
+
+        director.aprocess = fake_aprocess
+        directed = asyncio.run(director.aprocess_scripts(scripts))
+
+        self.assertEqual(peak, 3)  # bounded by the shared semaphore, not 3 per script
+        self.assertEqual([s.title for s in directed], ["T0", "T1"])
+        self.assertTrue(all(sc.panels[0].lighting == "Noon" for s in directed for sc in s.scenes))
+
+if __name__ == "__main__":
+    unittest.main()
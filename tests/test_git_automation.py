@@ -0,0 +1,50 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from src.agents.infrastructure import git_automation
+from src.agents.infrastructure.git_automation import GitAutomationAgent, GIT_ADD_ALL, GIT_DIFF_CACHED_QUIET
+
+class TestStageAndCommit(unittest.TestCase):
+    def setUp(self):
+        self.agent = GitAutomationAgent("GitTest")
+
+    def _broken_pygit2(self):
+        fake = MagicMock()
+        fake.Repository.side_effect = RuntimeError("libgit2 unavailable")
+        return fake
+
+    def test_falls_back_to_cli_when_pygit2_fails(self):
+        """Verify a pygit2 error falls back to git add/diff/commit on the CLI."""
+        with patch.object(git_automation, "pygit2", self._broken_pygit2()), \
+             patch.object(self.agent, "run_command") as run_command, \
+             patch.object(git_automation.subprocess, "run", return_value=MagicMock(returncode=1)) as run:
+            self.assertTrue(self.agent._stage_and_commit("msg"))
+
+        run.assert_called_once_with(GIT_DIFF_CACHED_QUIET)
+        self.assertEqual(run_command.call_args_list[0].args, (GIT_ADD_ALL,))
+        self.assertEqual(run_command.call_args_list[1].args, (["git", "commit", "-m", "msg"],))
+
+    def test_cli_nothing_to_commit(self):
+        """Verify a clean index (diff --cached exits 0) skips the commit."""
+        with patch.object(git_automation, "pygit2", None), \
+             patch.object(self.agent, "run_command") as run_command, \
+             patch.object(git_automation.subprocess, "run", return_value=MagicMock(returncode=0)):
+            self.assertFalse(self.agent._stage_and_commit("msg"))
+        run_command.assert_called_once_with(GIT_ADD_ALL)
+
+    def test_pygit2_path_skips_cli(self):
+        """Verify a working pygit2 commits in-process without touching the CLI."""
+        fake = MagicMock()
+        repo = fake.Repository.return_value
+        repo.head_is_unborn = False
+        repo.index.write_tree.return_value = "new-tree"
+        repo.head.peel.return_value.tree.id = "old-tree"
+        with patch.object(git_automation, "pygit2", fake), \
+             patch.object(self.agent, "run_command") as run_command, \
+             patch.object(git_automation.subprocess, "run") as run:
+            self.assertTrue(self.agent._stage_and_commit("msg"))
+        repo.create_commit.assert_called_once()
+        run_command.assert_not_called()
+        run.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
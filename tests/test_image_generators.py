@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from src.agents.production import image_generators
+from src.agents.production.image_generators import DiffusersImageGenerator, generated_image_name
+
+class _Halt(Exception):
+    """Raised by the stubbed encoder to stop generate_batch once the prompts to render are known."""
+
+def _bare_generator(output_dir: str) -> DiffusersImageGenerator:
+    """A DiffusersImageGenerator without a loaded pipeline, enough for the paths that precede the GPU."""
+    gen = object.__new__(DiffusersImageGenerator)
+    gen.output_dir = output_dir
+    gen.model_id = "sdxl"
+    gen.overwrite = False
+    return gen
+
+class TestGeneratedImageName(unittest.TestCase):
+    def test_every_pixel_input_changes_the_name(self):
+        """Verify the name is stable and changes with seed, size, negative prompt and model."""
+        base = generated_image_name("A desert", "blurry", 1024, 1024, 7, "sdxl")
+        self.assertEqual(base, generated_image_name("A desert", "blurry", 1024, 1024, 7, "sdxl"))
+        self.assertTrue(base.startswith("gen_") and base.endswith(".png"))
+        variants = [
+            generated_image_name("A desert", "blurry", 1024, 1024, 8, "sdxl"),
+            generated_image_name("A desert", "blurry", 1024, 768, 7, "sdxl"),
+            generated_image_name("A desert", "", 1024, 1024, 7, "sdxl"),
+            generated_image_name("A desert", "blurry", 1024, 1024, 7, "sdxl-turbo"),
+            generated_image_name("A desert", "blurry", 1024, 1024, None, "sdxl"),
+        ]
+        self.assertNotIn(base, variants)
+        self.assertEqual(len(set(variants)), len(variants))
+
+class TestGenerateBatchReuse(unittest.TestCase):
+    def test_existing_and_duplicate_prompts_reuse_one_path(self):
+        """Verify an all-cached batch returns without touching the GPU, duplicates sharing one path."""
+        with tempfile.TemporaryDirectory() as tmp:
+            gen = _bare_generator(tmp)
+            name = generated_image_name("A desert", model_id="sdxl")
+            open(os.path.join(tmp, name), "wb").close()
+
+            paths = gen.generate_batch(["A desert", "A desert", "A desert"])
+
+            self.assertEqual(paths, [os.path.join(tmp, name)] * 3)
+
+    def test_duplicates_rendered_once(self):
+        """Verify only distinct, uncached prompts reach the encoder."""
+        with tempfile.TemporaryDirectory() as tmp:
+            gen = _bare_generator(tmp)
+            open(os.path.join(tmp, generated_image_name("Cached", model_id="sdxl")), "wb").close()
+            seen = []
+
+            def encode(prompts, negative_prompt=""):
+                seen.extend(prompts)
+                raise _Halt()
+
+            gen._encode_prompts = encode
+            fake_torch = mock.MagicMock()
+            fake_torch.cuda.OutOfMemoryError = MemoryError
+            with mock.patch.object(image_generators, "torch", fake_torch), self.assertRaises(_Halt):
+                gen.generate_batch(["Oasis", "Cached", "Oasis", "Dunes", "Oasis"])
+
+            self.assertEqual(seen, ["Oasis", "Dunes"])
+
+class TestBatchBuckets(unittest.TestCase):
+    def test_bucketed_batch_size_is_next_power_of_two(self):
+        """Verify compiled batches are padded to the next power of two, and never shrunk."""
+        sizes = {n: DiffusersImageGenerator._bucketed_batch_size(n) for n in range(1, 18)}
+        self.assertEqual([sizes[n] for n in (1, 2, 3, 4, 5, 8, 9, 16, 17)], [1, 2, 4, 4, 8, 8, 16, 16, 32])
+        for n, size in sizes.items():
+            self.assertGreaterEqual(size, n)
+            self.assertEqual(size & (size - 1), 0)
+
+class TestSeededGenerators(unittest.TestCase):
+    def test_generators_reseeded_and_reused(self):
+        """Verify each row gets its own seed, padding reuses the last one, and generators are built once."""
+        gen = _bare_generator("output")
+        gen._generator = mock.Mock(device="cpu")
+        gen._batch_generators = []
+        fake_torch = mock.MagicMock()
+        fake_torch.Generator.side_effect = lambda device: mock.Mock(name=f"generator-{device}")
+
+        with mock.patch.object(image_generators, "torch", fake_torch):
+            first = gen._seeded_generators([1, None, 3], 4)
+            second = gen._seeded_generators([5, 6], 2)
+
+        self.assertEqual(fake_torch.Generator.call_count, 4)
+        first[0].manual_seed.assert_any_call(1)
+        first[1].seed.assert_called_once_with()
+        first[2].manual_seed.assert_called_once_with(3)
+        first[3].manual_seed.assert_called_once_with(3)  # Padding row repeats the last seed
+        self.assertEqual(second, first[:2])
+        second[1].manual_seed.assert_called_once_with(6)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+from src.agents.narrative.input_reader import InputReaderAgent
+
+class TestChunkText(unittest.TestCase):
+    def setUp(self):
+        self.reader = InputReaderAgent("InputReader")
+
+    def test_respects_paragraph_boundaries(self):
+        """Verify chunks are cut between paragraphs once the word budget is exceeded."""
+        text = "one two three\n\nfour five\n\nsix  seven\teight nine"
+        self.assertEqual(self.reader.chunk_text(text, max_words=5), [
+            "one two three\n\nfour five",
+            "six  seven\teight nine"
+        ])
+
+    def test_oversized_first_paragraph(self):
+        """Verify an oversized leading paragraph doesn't produce an empty chunk."""
+        text = "a b c d e f\n\ng"
+        self.assertEqual(self.reader.chunk_text(text, max_words=3), ["a b c d e f", "g"])
+
+    def test_single_chunk(self):
+        """Verify short text comes back unchanged."""
+        text = "A small knight battles a giant snail.\n\nThe end."
+        self.assertEqual(self.reader.chunk_text(text), [text])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from PIL import Image, ImageDraw
+from src.agents.assembly.lettering import LetteringAgent, _layout_bubbles, _load_font, lettered_path, FONT_PATH, FONT_SIZE
+from src.core.models import Panel
+
+class TestBubbleLayout(unittest.TestCase):
+    def setUp(self):
+        self.draw = ImageDraw.Draw(Image.new("RGB", (512, 512)))
+        self.font = _load_font(FONT_PATH, FONT_SIZE)
+
+    def test_bubbles_stack_downwards(self):
+        """Verify each bubble holds the speaker/text and starts below the previous one."""
+        bubbles = _layout_bubbles(self.draw, self.font, [
+            {"speaker": "Santiago", "text": "Where is the treasure?"},
+            {"text": "Follow the omens.\nAlways."},
+        ])
+        self.assertEqual([text for _, _, text in bubbles], [
+            "SANTIAGO\nWhere is the treasure?",
+            "UNKNOWN\nFollow the omens.\nAlways.",
+        ])
+        (first_rect, first_xy, _), (second_rect, second_xy, _) = bubbles
+        self.assertEqual(first_rect[:2], [20, 20])
+        self.assertEqual(first_xy, (40, 30))
+        self.assertGreater(second_rect[1], first_rect[3])
+        # Bubbles are sized from the glyph metrics, so more lines make a taller bubble
+        self.assertGreater(second_rect[3] - second_rect[1], first_rect[3] - first_rect[1])
+        self.assertEqual(second_xy, (40, second_rect[1] + 10))
+
+    def test_no_dialogue(self):
+        """Verify a panel without dialogue gets no bubbles."""
+        self.assertEqual(_layout_bubbles(self.draw, self.font, []), [])
+
+    def test_lettered_path(self):
+        """Verify the lettered file name follows the output format."""
+        self.assertEqual(lettered_path("output/gen_ab.png"), "output/gen_ab_lettered.png")
+        self.assertEqual(lettered_path("output/gen_ab.png", "webp"), "output/gen_ab_lettered.webp")
+
+class TestLetteringAgent(unittest.TestCase):
+    def test_scene_lettered_on_pool_then_shut_down(self):
+        """Verify a scene is lettered in panel order through run, and the pool refuses work after shutdown."""
+        agent = LetteringAgent(config={"max_workers": 2})
+        with tempfile.TemporaryDirectory() as tmp:
+            panels = []
+            for i in range(3):
+                path = os.path.join(tmp, f"panel{i}.png")
+                Image.new("RGB", (128, 128), "white").save(path)
+                panels.append(Panel(id=i, description="Dunes", image_path=path, dialogue=[{"speaker": "A", "text": "Hi"}]))
+            panels.append(Panel(id=3, description="Missing", image_path=os.path.join(tmp, "missing.png")))
+
+            results = agent.run(panels)
+
+            self.assertEqual(results, [lettered_path(p.image_path) for p in panels[:3]] + [None])
+            self.assertTrue(all(os.path.exists(r) for r in results[:3]))
+            agent.shutdown()
+            with self.assertRaises(RuntimeError):
+                agent.process_batch(panels[:2])
+
+if __name__ == "__main__":
+    unittest.main()
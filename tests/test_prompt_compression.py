@@ -54,5 +54,45 @@ class TestPromptCompression(unittest.TestCase):
         self.assertLessEqual(len(prompt), 1000) # Our char_limit is 225 * 4 = 900, with some margin
         self.assertIn("...", prompt)
 
+    def test_alias_lookup(self):
+        """Verify characters are found by alias, case-insensitively, and the first match wins."""
+        panel = Panel(id=4, description="Desert", characters_present=["the boy"], dialogue=[])
+        characters = [
+            Character(name="Santiago", aliases=["The Boy"], description="Young shepherd", personality="Quiet", pronouns="He/Him"),
+            Character(name="The Boy", description="Another boy", personality="Loud", pronouns="He/Him")
+        ]
+        prompt = self.manager.process(panel, characters)
+        self.assertIn("Santiago: Young shepherd", prompt)
+        self.assertNotIn("Another boy", prompt)
+
+    def test_duplicate_mentions_described_once(self):
+        """Verify a character listed by name and alias only appears once in the prompt."""
+        panel = Panel(id=5, description="Oasis", characters_present=["Santiago", "the boy"], dialogue=[])
+        characters = [
+            Character(name="Santiago", aliases=["The Boy"], description="Young shepherd", personality="Quiet", pronouns="He/Him")
+        ]
+        prompt = self.manager.process(panel, characters)
+        self.assertEqual(prompt.count("Young shepherd"), 1)
+
+    def test_prompt_cache(self):
+        """Verify repeated panels reuse the cached prompt until the visual memory or lineup changes."""
+        from unittest.mock import patch
+        panel = Panel(id=6, description="Market", characters_present=["Santiago"], dialogue=[])
+        characters = [Character(name="Santiago", description="Young shepherd", personality="Quiet", pronouns="He/Him")]
+        with patch.object(self.manager, "_assemble_and_compress", wraps=self.manager._assemble_and_compress) as assemble:
+            first = self.manager.process(panel, characters)
+            self.assertEqual(self.manager.process(panel, characters), first)
+            self.assertEqual(assemble.call_count, 1)
+
+            # New visual memory is part of the key
+            self.manager.add_to_memory("A caravan arrives")
+            self.assertIn("A caravan arrives", self.manager.process(panel, characters))
+            self.assertEqual(assemble.call_count, 2)
+
+            # So is the character lineup, even when edited in place
+            characters[0].description = "Older shepherd"
+            self.assertIn("Older shepherd", self.manager.process(panel, characters))
+            self.assertEqual(assemble.call_count, 3)
+
 if __name__ == "__main__":
     unittest.main()
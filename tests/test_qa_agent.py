@@ -0,0 +1,28 @@
+import os
+import tempfile
+import unittest
+from src.agents.infrastructure.qa_agent import PARALLEL_PARSE_THRESHOLD, QualityAssuranceAgent
+
+class TestScanCodebase(unittest.TestCase):
+    def test_pool_failures_not_reparsed(self):
+        """Verify a file that fails in the process pool is reported once and skipped by the serial pass."""
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "src")
+            os.makedirs(src)
+            for i in range(PARALLEL_PARSE_THRESHOLD):
+                with open(os.path.join(src, f"mod{i}.py"), "w", encoding="utf-8") as f:
+                    f.write(f"class A{i}:\n    def run(self):\n        pass\n")
+            broken = os.path.join(src, "broken.py")
+            with open(broken, "w", encoding="utf-8") as f:
+                f.write("def oops(:\n")
+
+            agent = QualityAssuranceAgent(config={"model": "test-model", "cache_path": os.path.join(tmp, "methods.pkl")})
+            with self.assertLogs(agent.logger, level="ERROR") as logs:
+                methods = agent.scan_codebase(src)
+
+            self.assertEqual(len(methods), PARALLEL_PARSE_THRESHOLD)
+            self.assertNotIn(broken, methods)
+            self.assertEqual(sum("Error parsing" in line for line in logs.output), 1)
+
+if __name__ == "__main__":
+    unittest.main()
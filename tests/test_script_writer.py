@@ -0,0 +1,40 @@
+import asyncio
+import unittest
+from src.agents.narrative.script_writer import ScriptWriterAgent
+from src.core.models import ComicScript
+
+class TestScriptWriterFanOut(unittest.TestCase):
+    def test_chunks_scripted_concurrently_in_order(self):
+        """Verify aprocess_all keeps input order and never exceeds llm_concurrency in-flight calls."""
+        writer = ScriptWriterAgent("ScriptWriter", config={"model_name": "test-model", "llm_concurrency": 2})
+        in_flight, peak = 0, 0
+
+        async def fake_agenerate(prompt, system_prompt, schema):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            title = prompt.strip().splitlines()[-1].strip()
+            return schema(title=title, synopsis="S", scenes=[])
+
+        writer.llm.agenerate_structured_output = fake_agenerate
+        scripts = asyncio.run(writer.aprocess_all([f"Chunk {i}" for i in range(5)]))
+
+        self.assertEqual(peak, 2)
+        self.assertTrue(all(isinstance(s, ComicScript) for s in scripts))
+        self.assertEqual([s.title for s in scripts], [f"Chunk {i}" for i in range(5)])
+
+    def test_aprocess_reraises(self):
+        """Verify a failed LLM call propagates out of aprocess."""
+        writer = ScriptWriterAgent("ScriptWriter", config={"model_name": "test-model"})
+
+        async def failing(**kwargs):
+            raise RuntimeError("provider down")
+
+        writer.llm.agenerate_structured_output = failing
+        with self.assertRaises(RuntimeError):
+            asyncio.run(writer.aprocess("Once upon a time"))
+
+if __name__ == "__main__":
+    unittest.main()
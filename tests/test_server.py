@@ -0,0 +1,86 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from src.core.checkpoint import PipelineState
+from src.core.models import Character, ComicScript
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "infrastructure", "server", "app.py")
+
+class TestServerState(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # The server creates its upload/output/checkpoint dirs relative to the working directory
+        cls.old_cwd = os.getcwd()
+        cls.test_dir = tempfile.mkdtemp()
+        os.chdir(cls.test_dir)
+        spec = importlib.util.spec_from_file_location("comic_server_app", APP_PATH)
+        cls.server = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(cls.server)
+        cls.client = TestClient(cls.server.app)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.checkpoint_mgr.shutdown()
+        os.chdir(cls.old_cwd)
+        shutil.rmtree(cls.test_dir)
+
+    def setUp(self):
+        # Keep checkpoint saves from trying to commit/push
+        self.patcher = patch("src.agents.infrastructure.git_automation.GitAutomationAgent")
+        self.patcher.start()
+        self.state = PipelineState(
+            input_hash="abc123def456",
+            master_script=ComicScript(title="T", synopsis="S", scenes=[]),
+            characters=[Character(name="A", description="a", personality="x", pronouns="They/Them")],
+            scene_plans={1: {"panels": []}},
+            metadata={"auto_run": False, "project_name": "Demo"}
+        )
+        self.server.checkpoint_mgr.save_checkpoint(self.state)
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_etag_not_modified(self):
+        """Verify polling with the last ETag gets a 304 until the checkpoint changes."""
+        first = self.client.get("/api/state/abc123def456")
+        self.assertEqual(first.status_code, 200)
+        self.assertFalse(first.json()["metadata"]["is_running"])
+        etag = first.headers["etag"]
+
+        again = self.client.get("/api/state/abc123def456", headers={"If-None-Match": etag})
+        self.assertEqual(again.status_code, 304)
+
+        self.client.post("/api/state/abc123def456/update", json={"metadata": {"project_name": "Renamed"}})
+        changed = self.client.get("/api/state/abc123def456", headers={"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["etag"], etag)
+        self.assertEqual(changed.json()["metadata"]["project_name"], "Renamed")
+
+    def test_missing_checkpoint(self):
+        """Verify an unknown hash reports a missing checkpoint."""
+        self.assertEqual(self.client.get("/api/state/ffffffffffff").json(), {"error": "Checkpoint not found"})
+
+    def test_merge_state_update(self):
+        """Verify dict fields are deep-merged, list fields replaced, and both merge paths agree."""
+        update = {
+            "metadata": {"auto_run": True},
+            "scene_plans": {"2": {"panels": []}},
+            "characters": [{"name": "B", "description": "b", "personality": "y", "pronouns": "She/Her"}],
+            "last_chunk_index": 3,
+        }
+        merged = self.server._merge_state_update(self.state, update)
+        self.assertEqual(merged.metadata, {"auto_run": True, "project_name": "Demo"})
+        self.assertEqual(set(merged.scene_plans), {1, 2})
+        self.assertEqual([c.name for c in merged.characters], ["B"])
+        self.assertIsInstance(merged.characters[0], Character)
+        self.assertEqual(merged.last_chunk_index, 3)
+        self.assertEqual(merged, self.server._merge_state_update_full(self.state, update))
+        # The original state is left untouched
+        self.assertEqual(self.state.metadata, {"auto_run": False, "project_name": "Demo"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+from src.agents.infrastructure.telemetry_agent import TelemetryAgent, _parse_line
+
+LOG_LINES = [
+    "2024-01-01 10:00:00,001 - Agent.ScriptWriter - INFO - Starting execution for ScriptWriter...",
+    "2024-01-01 10:00:01,001 - src.utils.llm_interface - INFO - LLM Request (Attempt 1/3) using llama3...",
+    "2024-01-01 10:00:02,001 - src.utils.llm_interface - WARNING - Attempt 1/3 failed: 1 validation error for dialogue",
+    "unrelated noise",
+    "2024-01-01 10:00:05,001 - Agent.ScriptWriter - INFO - Execution handling complete for ScriptWriter.",
+]
+
+class TestTelemetryParsing(unittest.TestCase):
+    def test_parse_line_prefixes(self):
+        """Verify the split parser classifies each traced message."""
+        self.assertEqual(_parse_line(LOG_LINES[0]), ("start", "2024-01-01 10:00:00", "ScriptWriter", None))
+        self.assertEqual(_parse_line(LOG_LINES[1]), ("llm", "2024-01-01 10:00:01", "llama3", None))
+        self.assertEqual(_parse_line(LOG_LINES[2]), ("retry", "2024-01-01 10:00:02", "1", "1 validation error for dialogue"))
+        self.assertEqual(_parse_line(LOG_LINES[4]), ("end", "2024-01-01 10:00:05", "ScriptWriter", None))
+        self.assertIsNone(_parse_line(LOG_LINES[3]))
+
+    def test_parse_line_regex_fallback(self):
+        """Verify retries outside the standard layout are still picked up."""
+        self.assertEqual(_parse_line("retry: Attempt 2/3 failed: boom"), ("retry", None, "2", "boom"))
+
+    def test_parse_line_without_timestamp(self):
+        """Verify a line whose first field is not a timestamp keeps its event but no timestamp."""
+        line = "worker-thread-pool-01 - src.core.agent - INFO - Starting execution for X..."
+        self.assertEqual(_parse_line(line), ("start", None, "X", None))
+        with tempfile.NamedTemporaryFile("w", suffix=".log", delete=False, encoding="utf-8") as f:
+            f.write(line + "\n" + LOG_LINES[4] + "\n")
+        try:
+            report = TelemetryAgent().process(f.name)
+        finally:
+            os.remove(f.name)
+        self.assertEqual(report["tracing"], [])
+
+    def test_process_skips_impossible_timestamps(self):
+        """Verify a well-laid-out but impossible timestamp is skipped instead of aborting the report."""
+        bad = LOG_LINES[0].replace("2024-01-01", "2024-13-01")
+        with tempfile.NamedTemporaryFile("w", suffix=".log", delete=False, encoding="utf-8") as f:
+            f.write("\n".join([bad, LOG_LINES[4]] + LOG_LINES) + "\n")
+        try:
+            report = TelemetryAgent().process(f.name)
+        finally:
+            os.remove(f.name)
+        self.assertEqual([t["duration_s"] for t in report["tracing"]], [5.0])
+
+    def test_process_builds_trace(self):
+        """Verify the full report from a small log file."""
+        with tempfile.NamedTemporaryFile("w", suffix=".log", delete=False, encoding="utf-8") as f:
+            f.write("\n".join(LOG_LINES) + "\n")
+        try:
+            report = TelemetryAgent().process(f.name)
+        finally:
+            os.remove(f.name)
+
+        self.assertEqual(report["summary"]["total_retries"], 1)
+        self.assertEqual(report["tracing"], [
+            {"agent": "ScriptWriter", "start": "2024-01-01 10:00:00", "end": "2024-01-01 10:00:05", "duration_s": 5.0}
+        ])
+        self.assertEqual(report["top_bottlenecks"], ["Slowest agents: ScriptWriter (5.0s)"])
+        self.assertEqual(report["hallucination_audit"], ["1 validation error for dialogue"])
+
+    def test_no_completed_stages(self):
+        """Verify a trace without completed stages reports no bottlenecks rather than an empty label."""
+        agent = TelemetryAgent()
+        self.assertEqual(agent._identify_bottlenecks([]), [])
+        with tempfile.NamedTemporaryFile("w", suffix=".log", delete=False, encoding="utf-8") as f:
+            f.write(LOG_LINES[0] + "\n" + LOG_LINES[3] + "\n")
+        try:
+            report = agent.process(f.name)
+        finally:
+            os.remove(f.name)
+        self.assertEqual(report["tracing"], [])
+        self.assertEqual(report["top_bottlenecks"], [])
+
+if __name__ == "__main__":
+    unittest.main()
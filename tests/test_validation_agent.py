@@ -0,0 +1,29 @@
+import os
+import tempfile
+import unittest
+from src.agents.infrastructure.validation_agent import PARALLEL_SYNTAX_THRESHOLD, check_syntax
+
+class TestCheckSyntax(unittest.TestCase):
+    def _files(self, tmp, count):
+        paths = []
+        for i in range(count):
+            path = os.path.join(tmp, f"mod{i}.py")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("x = 1\n")
+            paths.append(path)
+        broken = os.path.join(tmp, "broken.py")
+        with open(broken, "w", encoding="utf-8") as f:
+            f.write("def oops(:\n")
+        return paths + [broken], broken
+
+    def test_reports_only_broken_files(self):
+        """Verify the serial and pooled paths return one message per broken file."""
+        for count in (2, PARALLEL_SYNTAX_THRESHOLD):
+            with tempfile.TemporaryDirectory() as tmp:
+                paths, broken = self._files(tmp, count)
+                errors = check_syntax(paths)
+                self.assertEqual(len(errors), 1)
+                self.assertTrue(errors[0].startswith(broken))
+
+if __name__ == "__main__":
+    unittest.main()